@@ -0,0 +1,275 @@
+"""
+Benchmarks of RecklessNonlinearBlockGS against OpenMDAO NonlinearBlockGS on scalable
+coupled MDAs (see openmdao_extensions/tests/coupled_mda.py).
+
+Suites follow asv conventions (time_, peakmem_ and track_ methods) and can be run
+with asv. They can also be run standalone, measured values being compared to stored
+baselines to flag regressions. Wall times depend on the machine, they are compared
+relative to the time of the reference solver measured in the same session:
+
+    python benchmarks/benchmarks.py            # check against baselines.json
+    python benchmarks/benchmarks.py --save     # store current values as baselines
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import openmdao.api as om
+
+from openmdao_extensions.reckless_nonlinear_block_gs import RecklessNonlinearBlockGS
+from openmdao_extensions.tests.coupled_mda import CoupledMDA, CoupledMDAFactoryBase
+
+N_DISC = 4
+STRENGTH = 0.8
+NONLINEARITY = 0.1
+SIZES = [10, 1000, 100000]
+TOLERANCES = {"atol": 1e-10, "rtol": 1e-8, "maxiter": 200}
+
+SOLVERS = {
+    "nlbgs": lambda: om.NonlinearBlockGS(**TOLERANCES),
+    "nlbgs_aitken": lambda: om.NonlinearBlockGS(use_aitken=True, **TOLERANCES),
+    "reckless": lambda: RecklessNonlinearBlockGS(convrg_vars="auto", **TOLERANCES),
+    "reckless_plain": lambda: RecklessNonlinearBlockGS(**TOLERANCES),
+    "reckless_anderson": lambda: RecklessNonlinearBlockGS(
+        convrg_vars="auto", use_anderson=True, **TOLERANCES
+    ),
+    "reckless_newton": lambda: RecklessNonlinearBlockGS(
+        convrg_vars="auto", contraction_window=2, newton_switch=0.5, **TOLERANCES
+    ),
+    "reckless_apply": lambda: RecklessNonlinearBlockGS(
+        convrg_vars="auto", use_apply_nonlinear=True, **TOLERANCES
+    ),
+}
+REFERENCE_SOLVER = "nlbgs"
+# wall time is the minimum of repeated solves
+TIME_REPEAT = 3
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+# measured values greater than baseline times these factors, and by more than
+# these margins (measurement noise of small cases), are regressions
+REGRESSION_FACTORS = {
+    "sweeps": 1.0,
+    "apply_calls": 1.0,
+    "time_ratio": 1.5,
+    "peakmem": 1.2,
+}
+REGRESSION_MARGINS = {"sweeps": 0, "apply_calls": 0, "time_ratio": 0.5, "peakmem": 1e6}
+# with no option enabled, RecklessNonlinearBlockGS runs NonlinearBlockGS solves: its
+# time is checked against the reference solver itself, up to measurement noise
+PLAIN_SOLVER = "reckless_plain"
+PLAIN_MAX_TIME_RATIO = 1.1
+
+
+def create_problem(solver, size):
+    factory = CoupledMDAFactoryBase(
+        size=size, strength=STRENGTH, nonlinearity=NONLINEARITY
+    )
+    prob = om.Problem(CoupledMDA(n_disc=N_DISC, factory=factory), reports=False)
+    prob.model.nonlinear_solver = SOLVERS[solver]()
+    prob.model.nonlinear_solver.options["iprint"] = -1
+    prob.setup()
+    prob.final_setup()
+    return prob
+
+
+class NonlinearSolverSuite:
+    params = (list(SOLVERS), SIZES)
+    param_names = ["solver", "size"]
+    timeout = 600
+
+    def setup(self, solver, size):
+        self.prob = create_problem(solver, size)
+        self.initial = self.prob.model._outputs.asarray(copy=True)
+
+    def _run(self):
+        # every run starts from the same initial state
+        self.prob.model._outputs.set_val(self.initial)
+        self.prob.run_model()
+
+    def time_run_model(self, solver, size):
+        self._run()
+
+    def peakmem_run_model(self, solver, size):
+        self._run()
+
+    def track_sweeps(self, solver, size):
+        self._run()
+        return self.prob.model.disc0.iter_count
+
+    def track_apply_calls(self, solver, size):
+        self._run()
+        return sum(
+            self.prob.model._get_subsystem("disc{}".format(i)).iter_count_apply
+            for i in range(N_DISC)
+        )
+
+
+def _fresh_suite(solver, size):
+    # component counters add up over solves, each measurement uses its own problem
+    suite = NonlinearSolverSuite()
+    suite.setup(solver, size)
+    return suite
+
+
+def measure(solver, size):
+    """
+    Measure sweeps, apply_nonlinear calls, wall time and peak memory of a solve.
+
+    Each value is measured on a freshly set up problem.
+
+    Parameters
+    ----------
+    solver : str
+        solver name, one of SOLVERS.
+    size : int
+        size of coupling vectors.
+
+    Returns
+    -------
+    dict
+        measured values.
+    """
+    sweeps = _fresh_suite(solver, size).track_sweeps(solver, size)
+    apply_calls = _fresh_suite(solver, size).track_apply_calls(solver, size)
+
+    times = []
+    for _ in range(TIME_REPEAT):
+        suite = _fresh_suite(solver, size)
+        tic = time.perf_counter()
+        suite.time_run_model(solver, size)
+        times.append(time.perf_counter() - tic)
+
+    suite = _fresh_suite(solver, size)
+    tracemalloc.start()
+    suite.peakmem_run_model(solver, size)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "sweeps": sweeps,
+        "apply_calls": apply_calls,
+        "time": min(times),
+        "peakmem": peak,
+    }
+
+
+def check_regressions(results, baselines):
+    """
+    Compare measured values to baselines.
+
+    Parameters
+    ----------
+    results : dict
+        measured values by case name.
+    baselines : dict
+        baseline values by case name.
+
+    Returns
+    -------
+    list of str
+        regression descriptions.
+    """
+    regressions = []
+    for case, values in results.items():
+        baseline = baselines.get(case)
+        if baseline is None:
+            continue
+        for metric, factor in REGRESSION_FACTORS.items():
+            if metric not in baseline:
+                continue
+            if (
+                values[metric] > factor * baseline[metric]
+                and values[metric] - baseline[metric] > REGRESSION_MARGINS[metric]
+            ):
+                regressions.append(
+                    "{} {}: {:.4g} > {:.4g} (baseline)".format(
+                        case, metric, values[metric], baseline[metric]
+                    )
+                )
+    return regressions
+
+
+def check_plain_overhead(results):
+    """
+    Check that the plain reckless solver is not slower than the reference solver.
+
+    Parameters
+    ----------
+    results : dict
+        measured values by case name.
+
+    Returns
+    -------
+    list of str
+        overhead descriptions.
+    """
+    overheads = []
+    for case, values in results.items():
+        if (
+            case.rsplit("-", 1)[0] == PLAIN_SOLVER
+            and values["time_ratio"] > PLAIN_MAX_TIME_RATIO
+        ):
+            overheads.append(
+                "{} time_ratio: {:.4g} > {:.4g} ({} overhead)".format(
+                    case, values["time_ratio"], PLAIN_MAX_TIME_RATIO, REFERENCE_SOLVER
+                )
+            )
+    return overheads
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--save", action="store_true", help="store baselines")
+    parser.add_argument("--solvers", nargs="+", default=list(SOLVERS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=SIZES)
+    args = parser.parse_args(argv)
+
+    results = {}
+    for size in args.sizes:
+        reference = measure(REFERENCE_SOLVER, size)
+        for solver in args.solvers:
+            case = "{}-{}".format(solver, size)
+            if solver == REFERENCE_SOLVER:
+                values = dict(reference)
+            else:
+                values = measure(solver, size)
+            # absolute wall times only hold for the machine they are measured on
+            wall_time = values.pop("time")
+            values["time_ratio"] = wall_time / reference["time"]
+            results[case] = values
+            print(
+                "{:<28} sweeps {:>4}  apply {:>4}  time {:8.4f}s ({:6.2f})"
+                "  peakmem {:8.2f}MB".format(
+                    case,
+                    values["sweeps"],
+                    values["apply_calls"],
+                    wall_time,
+                    values["time_ratio"],
+                    values["peakmem"] / 1e6,
+                )
+            )
+
+    if args.save:
+        baselines = {}
+        if os.path.exists(BASELINES):
+            with open(BASELINES) as f:
+                baselines = json.load(f)
+        baselines.update(results)
+        with open(BASELINES, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        return 0
+
+    with open(BASELINES) as f:
+        regressions = check_regressions(results, json.load(f))
+    regressions += check_plain_overhead(results)
+    for regression in regressions:
+        print("Regression: " + regression)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
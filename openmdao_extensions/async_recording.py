@@ -0,0 +1,178 @@
+"""
+Asynchronous case recording of optimizer drivers
+"""
+
+import copy
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from openmdao.recorders.recording_manager import RecordingManager
+from openmdao.recorders.sqlite_recorder import SqliteRecorder
+
+
+class AsyncRecordingManager(RecordingManager):
+    """
+    Recording manager writing iterations to its recorders from a background thread.
+
+    Case data are copied into an in-memory buffer when an iteration is recorded, and
+    written by a writer thread which drains the buffer in batches. The buffer is a
+    bounded queue: recording blocks when the writer falls behind by queue_size cases.
+
+    Parameters
+    ----------
+    rec_mgr : RecordingManager
+        manager whose recorders are written asynchronously.
+    queue_size : int
+        maximum number of buffered cases.
+
+    Attributes
+    ----------
+    written: int
+        Number of cases written to recorders.
+    """
+
+    def __init__(self, rec_mgr, queue_size=100):
+        super(AsyncRecordingManager, self).__init__()
+        self._recorders = rec_mgr._recorders
+        self.rec_mgr = rec_mgr
+        self.written = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._error = None
+
+        for recorder in self._recorders:
+            if isinstance(recorder, SqliteRecorder) and recorder.connection:
+                self._share_connection(recorder)
+
+        self._writer = threading.Thread(target=self._write, daemon=True)
+        self._writer.start()
+
+    @staticmethod
+    def _share_connection(recorder):
+        """Reopen the database connection of the recorder to use it from the writer"""
+        filepath = recorder.connection.execute("PRAGMA database_list").fetchone()[2]
+        shared = recorder.metadata_connection is recorder.connection
+        recorder.connection.close()
+        recorder.connection = sqlite3.connect(filepath, check_same_thread=False)
+        if shared:
+            recorder.metadata_connection = recorder.connection
+
+    def _write(self):
+        while True:
+            batch = [self._queue.get()]
+            # drain every buffered case
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            for item in batch:
+                if item is not None and self._error is None:
+                    try:
+                        self._write_case(*item)
+                    except Exception as err:
+                        self._error = err
+                self._queue.task_done()
+            if batch[-1] is None:
+                return
+
+    def _write_case(self, recording_requester, coord, data, metadata):
+        # same as CaseRecorder.record_iteration with the coordinate at recording time
+        for recorder in self._recorders:
+            if not recorder._parallel or recorder._record_on_proc:
+                recorder._counter += 1
+                recorder._iteration_coordinate = coord
+                recorder.record_iteration_driver(recording_requester, data, metadata)
+        self.written += 1
+
+    def _check_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError("Asynchronous case recording failed.") from error
+
+    def record_iteration(self, recording_requester, data, metadata):
+        """
+        Buffer a copy of the data of an iteration to be written by the writer thread.
+
+        Parameters
+        ----------
+        recording_requester : <Driver>
+            The driver that needs an iteration of itself recorded.
+        data : dict
+            Dictionary containing desvars, objectives, constraints, responses, and
+            System vars.
+        metadata : dict
+            Metadata for iteration coordinate.
+        """
+        self._check_error()
+        if not self._recorders:
+            return
+
+        if metadata is not None:
+            metadata["timestamp"] = time.perf_counter()
+        coord = recording_requester._recording_iter.get_formatted_iteration_coordinate()
+        # recorded values are views of model vectors
+        self._queue.put(
+            (recording_requester, coord, copy.deepcopy(data), copy.deepcopy(metadata))
+        )
+
+    def record_derivatives(self, recording_requester, data, metadata):
+        """
+        Write buffered iterations then derivatives.
+
+        Parameters
+        ----------
+        recording_requester : object
+            The object that needs an iteration of itself recorded.
+        data : dict
+            Dictionary containing derivatives keyed by 'of,wrt' to be recorded.
+        metadata : dict
+            Metadata for iteration coordinate.
+        """
+        self.flush()
+        super(AsyncRecordingManager, self).record_derivatives(
+            recording_requester, data, metadata
+        )
+
+    def flush(self):
+        """Wait until every buffered iteration is written."""
+        self._queue.join()
+        self._check_error()
+
+    def close(self):
+        """Write every buffered iteration and stop the writer thread."""
+        self._queue.put(None)
+        self._writer.join()
+        self._check_error()
+
+
+@contextmanager
+def async_recording(driver, enabled=True, queue_size=100):
+    """
+    Context manager recording iterations of a driver asynchronously.
+
+    Buffered iterations are written when the context exits.
+
+    Parameters
+    ----------
+    driver : <Driver>
+        driver whose recorders are written asynchronously.
+    enabled : bool
+        when False, iterations are recorded synchronously.
+    queue_size : int
+        maximum number of buffered cases.
+    """
+    if not enabled:
+        yield
+        return
+
+    rec_mgr = driver._rec_mgr
+    driver._rec_mgr = AsyncRecordingManager(rec_mgr, queue_size)
+    try:
+        yield
+    finally:
+        async_rec_mgr, driver._rec_mgr = driver._rec_mgr, rec_mgr
+        async_rec_mgr.close()
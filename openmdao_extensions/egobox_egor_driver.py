@@ -1,9 +1,34 @@
+import glob
+import os
 import numpy as np
+import queue
+import threading
+import time
 import traceback
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
 
 from openmdao.core.driver import Driver, RecordingDebugging
 from openmdao.core.analysis_error import AnalysisError
 
+from openmdao_extensions.async_recording import async_recording
+from openmdao_extensions.reckless_nonlinear_block_gs import publish_optim_stage
+from openmdao_extensions.scatter_maps import (
+    compile_scatter_maps,
+    get_design_var_bounds,
+    set_design_point,
+)
+from openmdao_extensions.state_cache import (
+    EvaluationCache,
+    EvaluationHistory,
+    _write_npz,
+)
+
 EGOBOX_NOT_INSTALLED = False
 try:
     import egobox as egx
@@ -24,6 +49,265 @@ def to_list(lst, size):
         return lst
 
 
+def _response_names(driver):
+    """Names of the objective then constraints in the order of response rows"""
+    return list(driver._objs) + list(driver._cons)
+
+
+def _get_responses(driver, row, maps):
+    """Fill row with objective then constraint values of the driver problem"""
+    if maps is not None:
+        row[:] = maps.get_responses()
+        return
+
+    values = driver.get_objective_values()
+    values.update(driver.get_constraint_values())
+    row[:] = np.concatenate(
+        [np.ravel(values[name]) for name in _response_names(driver)]
+    )
+
+
+def _create_replica(factory):
+    """Create a model replica with the scatter maps of its driver"""
+    prob = factory()
+    prob.final_setup()
+    return prob, compile_scatter_maps(prob.driver, _response_names(prob.driver))
+
+
+def _evaluate_replica(replica, point, n_cstr, stage=None):
+    """
+    Evaluate a design point on a model replica at the given optimization stage.
+
+    Returns the response row, NaN when the evaluation failed, and whether the
+    evaluation succeeded.
+    """
+    prob, maps = replica
+    row = np.zeros(1 + n_cstr)
+    success = True
+    try:
+        publish_optim_stage(prob.model, stage)
+        set_design_point(prob.driver, point, maps)
+        try:
+            prob.model.run_solve_nonlinear()
+        # Let the optimizer try to handle the error
+        except AnalysisError:
+            prob.model._clear_iprint()
+            success = False
+        _get_responses(prob.driver, row, maps)
+    except Exception as msg:
+        tb = traceback.format_exc()
+        print("Exception: %s" % str(msg))
+        print(70 * "=", tb, 70 * "=")
+        success = False
+    if not success:
+        row[:] = np.nan
+    return row, success
+
+
+def _failure_probability(point, xs, failed, xlimits, n_neighbors=3):
+    """
+    Failure probability of a design point estimated from evaluated points.
+
+    Failure flags of the nearest evaluated points are averaged with inverse distance
+    weights, distances being computed in design space normalized by its bounds.
+    """
+    span = xlimits[:, 1] - xlimits[:, 0]
+    span[span <= 0.0] = 1.0
+    dists = np.linalg.norm((np.asarray(xs) - point) / span, axis=1)
+    nearest = np.argsort(dists)[:n_neighbors]
+    weights = 1.0 / np.maximum(dists[nearest], 1e-12)
+    return np.dot(weights, failed[nearest]) / np.sum(weights)
+
+
+# model replica of a worker process of the process pool
+_replica = None
+
+
+def _init_process_replica(factory):
+    global _replica
+    _replica = _create_replica(factory)
+
+
+def _evaluate_process_replica(point, n_cstr, stage=None):
+    return _evaluate_replica(_replica, point, n_cstr, stage)
+
+
+class ReplicaPoolEvaluator(object):
+    """
+    Evaluator of design points on model replicas of a local process pool.
+
+    Evaluators are used by EgoboxEgorDriver in ask/tell mode: submit(point, n_cstr,
+    stage) returns a future of the (row, success) evaluation result, the optimization
+    stage being published to the solvers of the replica, and shutdown() releases
+    resources at the end of the run.
+
+    Parameters
+    ----------
+    replica_factory : callable
+        picklable callable returning a set up Problem replica of the driver problem.
+    n_workers : int
+        number of worker processes.
+    """
+
+    def __init__(self, replica_factory, n_workers):
+        self._pool = ProcessPoolExecutor(
+            max_workers=n_workers,
+            initializer=_init_process_replica,
+            initargs=(replica_factory,),
+        )
+
+    def submit(self, point, n_cstr, stage=None):
+        """Submit the evaluation of a design point at the given optimization stage."""
+        return self._pool.submit(_evaluate_process_replica, point, n_cstr, stage)
+
+    def shutdown(self):
+        """Stop worker processes."""
+        self._pool.shutdown()
+
+
+class FileQueueEvaluator(object):
+    """
+    Evaluator of design points by workers serving job files of a directory.
+
+    A job_<id>.npz file is written for each submitted point, the future being
+    completed when the result_<id>.npz file written by a worker appears (see
+    serve_file_queue), with the exception raised when reading it if it is not
+    a valid result file. Workers can run on any host sharing the directory.
+
+    Parameters
+    ----------
+    directory : str
+        directory of job and result files.
+    poll_interval : float
+        delay in seconds between two checks of result files.
+    """
+
+    def __init__(self, directory, poll_interval=0.1):
+        self.directory = directory
+        self.poll_interval = poll_interval
+        os.makedirs(directory, exist_ok=True)
+        # left by a previous run
+        if os.path.exists(os.path.join(directory, "stop")):
+            os.remove(os.path.join(directory, "stop"))
+        self._futures = {}
+        self._n_jobs = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._poller = threading.Thread(target=self._poll, daemon=True)
+        self._poller.start()
+
+    def submit(self, point, n_cstr, stage=None):
+        """Submit the evaluation of a design point at the given optimization stage."""
+        future = Future()
+        with self._lock:
+            job_id = "{}_{}".format(os.getpid(), self._n_jobs)
+            self._n_jobs += 1
+            self._futures[job_id] = future
+        # no stage is written as an empty string
+        _write_npz(self._path("job", job_id), x=point, n_cstr=n_cstr, stage=stage or "")
+        return future
+
+    def _path(self, kind, job_id):
+        return os.path.join(self.directory, "{}_{}.npz".format(kind, job_id))
+
+    def _poll(self):
+        while not self._stop.wait(self.poll_interval):
+            with self._lock:
+                job_ids = list(self._futures)
+            for job_id in job_ids:
+                filename = self._path("result", job_id)
+                if not os.path.exists(filename):
+                    continue
+                with self._lock:
+                    future = self._futures.pop(job_id)
+                try:
+                    with np.load(filename) as data:
+                        result = (data["y"], bool(data["success"]))
+                    os.remove(filename)
+                # an unreadable result fails its evaluation, polling goes on
+                except Exception as err:
+                    future.set_exception(err)
+                else:
+                    future.set_result(result)
+
+    def shutdown(self):
+        """Stop polling results and tell workers to exit."""
+        self._stop.set()
+        self._poller.join()
+        open(os.path.join(self.directory, "stop"), "w").close()
+
+
+def serve_file_queue(directory, replica_factory, poll_interval=0.1, max_jobs=None):
+    """
+    Evaluate jobs of a FileQueueEvaluator directory on a model replica.
+
+    Several workers can serve the same directory, jobs being claimed by renaming
+    their file. The worker exits when the evaluator is shut down.
+
+    Parameters
+    ----------
+    directory : str
+        directory of job and result files.
+    replica_factory : callable
+        callable returning a set up Problem replica of the driver problem.
+    poll_interval : float
+        delay in seconds between two checks of job files.
+    max_jobs : int or None
+        number of jobs after which the worker exits, unlimited when None.
+
+    Returns
+    -------
+    int
+        number of evaluated jobs.
+    """
+    replica = _create_replica(replica_factory)
+    n_jobs = 0
+    while max_jobs is None or n_jobs < max_jobs:
+        filenames = sorted(glob.glob(os.path.join(directory, "job_*.npz")))
+        if not filenames:
+            if os.path.exists(os.path.join(directory, "stop")):
+                break
+            time.sleep(poll_interval)
+            continue
+        for filename in filenames:
+            claimed = filename + ".running"
+            try:
+                os.rename(filename, claimed)
+            except OSError:
+                # claimed by another worker
+                continue
+            with np.load(claimed) as data:
+                point, n_cstr = data["x"], int(data["n_cstr"])
+                stage = str(data["stage"]) if "stage" in data.files else ""
+            row, success = _evaluate_replica(replica, point, n_cstr, stage or None)
+            job_id = os.path.basename(filename)[len("job_") : -len(".npz")]
+            _write_npz(
+                os.path.join(directory, "result_{}.npz".format(job_id)),
+                y=row,
+                success=success,
+            )
+            os.remove(claimed)
+            n_jobs += 1
+            if n_jobs == max_jobs:
+                break
+    return n_jobs
+
+
+def _successful(xs, ys):
+    """Points and responses of successful evaluations"""
+    ok = [not np.isnan(row).any() for row in ys]
+    if not any(ok):
+        raise RuntimeError("Every evaluation of the model failed.")
+    return (
+        [x for x, keep in zip(xs, ok) if keep],
+        [y for y, keep in zip(ys, ok) if keep],
+    )
+
+
+# number of times Egor is asked again when its infill candidates are likely to fail
+_MAX_REJECTIONS = 5
+
+
 class EgoboxEgorDriver(Driver):
     """OpenMDAO driver for egobox optimizer"""
 
@@ -51,6 +335,11 @@ class EgoboxEgorDriver(Driver):
         self.supports._read_only = True
 
         self.opt_settings = {}
+        self._pool = self._replicas = None
+        self._checkpoint = None
+        self._scatter_maps = None
+        self.eval_cache = None
+        self.n_failures = 0
 
     def _declare_options(self):
         self.options.declare(
@@ -59,19 +348,152 @@ class EgoboxEgorDriver(Driver):
             values=["EGOR"],
             desc="Name of optimizer to use",
         )
+        self.options.declare(
+            "exploration_ratio",
+            default=0.5,
+            lower=0.0,
+            upper=1.0,
+            desc="fraction of optimizer iterations published as exploration stage to"
+            " the solvers of the model, remaining ones being published as exploitation"
+            " stage (see RecklessNonlinearBlockGS rtol_schedule option)",
+        )
+        self.options.declare(
+            "parallel",
+            default=None,
+            values=[None, "thread", "process"],
+            allow_none=True,
+            desc="evaluate the points of a batch concurrently on model replicas with a"
+            " thread pool or a process pool (for models holding the GIL), sequentially"
+            " on the driver model when None",
+        )
+        self.options.declare(
+            "n_workers",
+            default=None,
+            types=int,
+            lower=1,
+            allow_none=True,
+            desc="number of workers and model replicas of the parallel mode, the batch"
+            " size of the qei_config optimizer setting by default",
+        )
+        self.options.declare(
+            "replica_factory",
+            default=None,
+            allow_none=True,
+            recordable=False,
+            desc="callable returning a set up Problem replica of the driver problem"
+            " (with the same design variables, objective and constraints) used by the"
+            " parallel mode, it has to be picklable with the process pool",
+        )
+        self.options.declare(
+            "eval_cache",
+            default=False,
+            types=bool,
+            desc="reuse responses of already evaluated design points instead of"
+            " running the model, hits and misses being counted by eval_cache attribute",
+        )
+        self.options.declare(
+            "eval_cache_tol",
+            default=0.0,
+            lower=0.0,
+            desc="quantization step of design points of the evaluation cache, points"
+            " equal within this tolerance sharing their responses, 0 for exact match",
+        )
+        self.options.declare(
+            "eval_cache_file",
+            default=None,
+            types=str,
+            allow_none=True,
+            desc="file where the evaluation cache is saved after each batch and loaded"
+            " from when the run starts, to share evaluations between runs",
+        )
+        self.options.declare(
+            "checkpoint_file",
+            default=None,
+            types=str,
+            allow_none=True,
+            desc="file where evaluated points and responses are saved after each"
+            " batch, an existing checkpoint being used to resume the optimization"
+            " without evaluating its points again. Rows are appended to a _rows.npy"
+            " file next to it (see EvaluationHistory)",
+        )
+        self.options.declare(
+            "ask_tell",
+            default=False,
+            types=bool,
+            desc="run asynchronously, points suggested by Egor being submitted to the"
+            " evaluator as soon as a worker is free, pending points being believed to"
+            " be as good as the best evaluated one",
+        )
+        self.options.declare(
+            "evaluator",
+            default=None,
+            allow_none=True,
+            recordable=False,
+            desc="evaluator of the ask/tell mode with submit(point, n_cstr, stage) and"
+            " shutdown() methods, ReplicaPoolEvaluator(replica_factory, n_workers)"
+            " by default (see also FileQueueEvaluator)",
+        )
+        self.options.declare(
+            "failsafe_strategy",
+            default="viability",
+            values=["rejection", "imputation", "viability"],
+            desc="handling of failed evaluations, told to Egor as NaN responses and"
+            " excluded from objective and constraint surrogates: failed points are"
+            " ignored (rejection), filled with surrogate predictions (imputation) or"
+            " used to train a surrogate of the failure region constraining the infill"
+            " (viability). In ask/tell mode, infill candidates likely to fail according"
+            " to their nearest evaluated points are rejected whatever the strategy",
+        )
+        self.options.declare(
+            "async_recording",
+            default=False,
+            types=bool,
+            desc="record iterations from a background writer thread, case data being"
+            " buffered in memory and written in batches, every case being written"
+            " when the run exits",
+        )
+        self.options.declare(
+            "recording_queue_size",
+            default=100,
+            types=int,
+            lower=1,
+            desc="maximum number of cases buffered by asynchronous recording,"
+            " recording blocks when the writer falls behind",
+        )
 
     def _setup_driver(self, problem):
         super(EgoboxEgorDriver, self)._setup_driver(problem)
 
+        # per evaluation transfers are vectorized
+        self._scatter_maps = compile_scatter_maps(self, _response_names(self))
+
         self.comm = None
 
     def run(self):
+        with async_recording(
+            self,
+            self.options["async_recording"],
+            self.options["recording_queue_size"],
+        ):
+            return self._optimize()
+
+    def _optimize(self):
         model = self._problem().model
 
         self.iter_count = 0
         self.name = f"egobox_optimizer_{self.options['optimizer'].lower()}"
+        self._n_calls = 0
+        self.n_failures = 0
+
+        self.eval_cache = None
+        if self.options["eval_cache"]:
+            self.eval_cache = EvaluationCache(self.options["eval_cache_tol"])
+            filename = self.options["eval_cache_file"]
+            if filename is not None and os.path.exists(filename):
+                self.eval_cache.load(filename)
 
         # Initial Run
+        publish_optim_stage(model, "doe")
         with RecordingDebugging(self.name, self.iter_count, self) as rec:
             # Initial Run
             model.run_solve_nonlinear()
@@ -89,8 +511,12 @@ class EgoboxEgorDriver(Driver):
         cstr_tol = [1e-4] * self.n_cstr if self.n_cstr else []
         optim_settings = {
             "cstr_tol": cstr_tol,
+            "failsafe_strategy": getattr(
+                egx.FailsafeStrategy, self.options["failsafe_strategy"].upper()
+            ),
         }
         n_iter = self.opt_settings["maxiter"]
+        self._n_exploration = int(self.options["exploration_ratio"] * n_iter)
 
         # Manage gp_config special case: conf object GpConfig
         gp_config_args = self.opt_settings.get("gp_config", {})
@@ -110,6 +536,19 @@ class EgoboxEgorDriver(Driver):
 
         gp_config = GpConfig(**gp_config_args)
 
+        # Resume from checkpointed evaluations given as initial DOE
+        self._checkpoint = None
+        filename = self.options["checkpoint_file"]
+        if filename is not None:
+            self._checkpoint = EvaluationHistory(filename)
+            if os.path.exists(filename):
+                x_doe, y_doe = self._checkpoint.load()
+                self._n_calls = self._checkpoint.n_calls
+                optim_settings["x_doe"] = x_doe
+                optim_settings["y_doe"] = y_doe
+                # the first call evaluates the DOE
+                n_iter = max(n_iter - max(self._n_calls - 1, 0), 0)
+
         # Instanciate a SEGO optimizer
         egor = Egor(
             xspecs=self.xspecs,
@@ -119,23 +558,284 @@ class EgoboxEgorDriver(Driver):
         )
 
         # Run the optim
-        res = egor.minimize(self._objfunc, max_iters=n_iter)
+        self._pool = self._create_pool()
+        try:
+            if self.options["ask_tell"]:
+                res = self._ask_tell(egor, n_iter, optim_settings)
+            else:
+                res = egor.minimize(self._objfunc, max_iters=n_iter)
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+            self._pool = self._replicas = None
+            if self._checkpoint is not None:
+                self._checkpoint.close()
 
         # Set optimal parameters
-        i = 0
-        for name, meta in self._designvars.items():
-            size = meta["size"]
-            self.set_design_var(name, res.x_opt[i : i + size])
-            i += size
+        set_design_point(self, res.x_opt, self._scatter_maps)
 
+        # Final run is always solved with tight tolerances
+        publish_optim_stage(model, "final")
         with RecordingDebugging(self.name, self.iter_count, self) as rec:
             model.run_solve_nonlinear()
             rec.abs = 0.0
             rec.rel = 0.0
         self.iter_count += 1
+        publish_optim_stage(model, None)
 
         return True
 
+    def _get_q_points(self):
+        qei_config = self.opt_settings.get("qei_config")
+        if qei_config is None:
+            return 1
+        if isinstance(qei_config, dict):
+            return qei_config.get("batch", 1)
+        return qei_config.batch
+
+    def _get_optim_stage(self, n_calls):
+        """Stage of the optimization at the given optimizer call"""
+        # Egor evaluates the initial DOE in the first call then one batch per iteration
+        if n_calls == 0:
+            return "doe"
+        elif n_calls <= self._n_exploration:
+            return "exploration"
+        return "exploitation"
+
+    def _create_pool(self):
+        """Create the worker pool and model replicas of the parallel mode"""
+        self._replicas = None
+        parallel = self.options["parallel"]
+        if parallel is None:
+            return None
+
+        factory = self.options["replica_factory"]
+        if factory is None:
+            raise RuntimeError(
+                "A replica_factory has to be given to evaluate points in parallel."
+            )
+        n_workers = self.options["n_workers"] or self._get_q_points()
+
+        if parallel == "process":
+            return ProcessPoolExecutor(
+                max_workers=n_workers,
+                initializer=_init_process_replica,
+                initargs=(factory,),
+            )
+
+        self._replicas = queue.Queue()
+        for _ in range(n_workers):
+            replica = _create_replica(factory)
+            dvs = list(replica[0].driver._designvars)
+            if dvs != list(self._designvars):
+                raise RuntimeError(
+                    "Replica design variables {} do not match driver ones {}.".format(
+                        dvs, list(self._designvars)
+                    )
+                )
+            self._replicas.put(replica)
+        return ThreadPoolExecutor(max_workers=n_workers)
+
+    def _evaluate_thread_replica(self, point, stage):
+        replica = self._replicas.get()
+        try:
+            return _evaluate_replica(replica, point, self.n_cstr, stage)
+        finally:
+            self._replicas.put(replica)
+
+    def _evaluate_point(self, point, row):
+        """Evaluate a design point on the driver model, returning whether it succeeded
+
+        Responses of failed evaluations are NaN, Egor handling them with its failsafe
+        strategy instead of believing zero objective and satisfied constraints.
+        """
+        model = self._problem().model
+        success = True
+        try:
+            # Pass in new parameters
+            set_design_point(self, point, self._scatter_maps)
+
+            # Execute the model
+            with RecordingDebugging(
+                self.options["optimizer"], self.iter_count, self
+            ) as _:
+                self.iter_count += 1
+                try:
+                    model.run_solve_nonlinear()
+
+                # Let the optimizer try to handle the error
+                except AnalysisError:
+                    model._clear_iprint()
+                    success = False
+
+            _get_responses(self, row, self._scatter_maps)
+
+        except Exception as msg:
+            tb = traceback.format_exc()
+            print("Exception: %s" % str(msg))
+            print(70 * "=", tb, 70 * "=")
+            success = False
+        if not success:
+            row[:] = np.nan
+        return success
+
+    def _ask_tell(self, egor, n_iter, optim_settings):
+        """
+        Optimize with points suggested by Egor and evaluated asynchronously.
+
+        As many points as workers are evaluated at any time, Egor being asked for a
+        new point as soon as a result is told. Pending points are given to Egor with
+        responses of the best evaluated point (constant liar) so that they are not
+        suggested again. Failed points are excluded from the points given to Egor and
+        used to reject infill candidates likely to fail (see _suggest).
+        """
+        if self.options["parallel"] is not None:
+            raise RuntimeError("parallel and ask_tell options are exclusive.")
+        n_workers = self.options["n_workers"] or self._get_q_points()
+        evaluator = self.options["evaluator"]
+        if evaluator is None:
+            factory = self.options["replica_factory"]
+            if factory is None:
+                raise RuntimeError(
+                    "A replica_factory or an evaluator has to be given to run in"
+                    " ask/tell mode."
+                )
+            evaluator = ReplicaPoolEvaluator(factory, n_workers)
+
+        xs, ys = [], []
+        x_doe = optim_settings.get("x_doe")
+        if x_doe is None:
+            n_doe = optim_settings.get("n_doe") or len(self.xspecs) + 1
+            x_doe = egx.lhs(self.xspecs, n_doe, seed=optim_settings.get("seed"))
+        elif optim_settings.get("y_doe") is not None:
+            xs = list(x_doe)
+            ys = list(optim_settings["y_doe"])
+            x_doe = []
+        q_points = self._get_q_points()
+        n_evals = n_iter * q_points
+        self._n_told = 0
+
+        pending = {}
+        try:
+            # surrogates are trained on the whole DOE
+            for point in x_doe:
+                self._submit(evaluator, point, "doe", pending, xs, ys)
+            while pending:
+                self._tell(pending, xs, ys)
+            self._n_calls = max(self._n_calls, 1)
+            self._save_eval_cache()
+
+            # each q suggested points count as an optimizer call
+            n_calls = self._n_calls
+            n_suggested = 0
+            while n_evals > 0 or pending:
+                while n_evals > 0 and len(pending) < n_workers:
+                    n_points = min(n_workers - len(pending), n_evals)
+                    for point in self._suggest(egor, xs, ys, pending, n_points):
+                        stage = self._get_optim_stage(n_calls + n_suggested // q_points)
+                        self._submit(evaluator, point, stage, pending, xs, ys)
+                        n_suggested += 1
+                        n_evals -= 1
+                if pending:
+                    self._tell(pending, xs, ys)
+        finally:
+            self._save_eval_cache()
+            if self.options["evaluator"] is None:
+                evaluator.shutdown()
+
+        x_ok, y_ok = _successful(xs, ys)
+        return egor.best_result(np.array(x_ok), np.array(y_ok))
+
+    def _suggest(self, egor, xs, ys, pending, n_points):
+        """
+        Ask Egor for at most n_points points to evaluate.
+
+        Egor surrogates cannot be trained on NaN responses: failed points are left out
+        and a nearest neighbours classifier of evaluated points filters candidates
+        instead. Candidates likely to fail are believed like pending points and Egor
+        is asked again, up to _MAX_REJECTIONS times. Until as many evaluations as the
+        default DOE size succeed, new LHS points are suggested.
+        """
+        failed = np.array([np.isnan(row).any() for row in ys], dtype=bool)
+        if np.count_nonzero(~failed) < len(self.xspecs) + 1:
+            # too few points to train surrogates, sampled again with another seed
+            # for every evaluated point
+            seed = self.opt_settings.get("seed")
+            if seed is not None:
+                seed += len(ys)
+            # egobox does not return from sampling a single point
+            return list(egx.lhs(self.xspecs, max(n_points, 2), seed=seed)[:n_points])
+        x_ok, y_ok = _successful(xs, ys)
+        liar = y_ok[egor.best_index(np.array(y_ok))]
+        believed = list(pending.values())
+        for _ in range(_MAX_REJECTIONS):
+            x = np.array(x_ok + believed)
+            y = np.array(y_ok + [liar] * len(believed))
+            candidates = list(egor.suggest(x, y)[:n_points])
+            if not failed.any():
+                return candidates
+            accepted = []
+            for point in candidates:
+                if _failure_probability(point, xs, failed, self._xlimits) > 0.5:
+                    believed.append(point)
+                else:
+                    accepted.append(point)
+            if accepted:
+                return accepted
+        return candidates
+
+    def _submit(self, evaluator, point, stage, pending, xs, ys):
+        """Submit a point to the evaluator unless its responses are cached"""
+        row = None if self.eval_cache is None else self.eval_cache.get(point)
+        if row is None:
+            pending[evaluator.submit(point, self.n_cstr, stage)] = point
+        else:
+            # already cached
+            self._store(point, row, False, xs, ys)
+
+    def _tell(self, pending, xs, ys):
+        """Store results of completed evaluations, an evaluator error being a failure"""
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            point = pending.pop(future)
+            try:
+                row, success = future.result()
+            except Exception as msg:
+                tb = "".join(traceback.format_exception(msg))
+                print("Exception: %s" % str(msg))
+                print(70 * "=", tb, 70 * "=")
+                row, success = np.full(1 + self.n_cstr, np.nan), False
+            self.iter_count += 1
+            if not success:
+                self.n_failures += 1
+            self._store(point, np.asarray(row, dtype=float), success, xs, ys)
+
+    def _store(self, point, row, success, xs, ys):
+        """Add evaluated responses to the history, the cache and the checkpoint
+
+        The checkpoint is appended with each point, the cache file being saved
+        once per batch of q points (see _ask_tell).
+        """
+        xs.append(point)
+        ys.append(row)
+        if self.eval_cache is not None and success:
+            self.eval_cache.add(point, row)
+        # the DOE then each batch of q points count as an optimizer call
+        if self._n_calls > 0:
+            self._n_told += 1
+            if self._n_told == self._get_q_points():
+                self._n_calls += 1
+                self._n_told = 0
+                self._save_eval_cache()
+        if self._checkpoint is not None:
+            self._checkpoint.append(point[np.newaxis], row[np.newaxis], self._n_calls)
+
+    def _save_eval_cache(self):
+        """Save the evaluation cache in its file if any"""
+        filename = self.options["eval_cache_file"]
+        if self.eval_cache is not None and filename is not None:
+            self.eval_cache.save(filename)
+
     def _initialize_vars(self, model):
         dvs_int = {}
         for name, meta in self._designvars.items():
@@ -146,28 +846,17 @@ class EgoboxEgorDriver(Driver):
                 ):
                     dvs_int[name] = egx.XType.INT
 
+        # design points are in driver scaling and units
+        bounds = get_design_var_bounds(self)
         variables = []
-        desvars = self._designvars
-        for name, meta in desvars.items():
+        for name in self._designvars:
             vartype = dvs_int.get(name, egx.XType.FLOAT)
-            size = meta["size"]
-            meta_low = meta["lower"]
-            meta_high = meta["upper"]
-            if size > 1:
-                for j in range(size):
-                    if isinstance(meta_low, np.ndarray):
-                        p_low = meta_low[j]
-                    else:
-                        p_low = meta_low
-
-                    if isinstance(meta_high, np.ndarray):
-                        p_high = meta_high[j]
-                    else:
-                        p_high = meta_high
-
-                    variables += [egx.XSpec(vartype, [p_low, p_high])]
-            else:
-                variables += [egx.XSpec(vartype, [meta_low, meta_high])]
+            lower, upper = bounds[name]
+            variables += [
+                egx.XSpec(vartype, [p_low, p_high])
+                for p_low, p_high in zip(lower, upper)
+            ]
+        self._xlimits = np.array([spec.xlimits for spec in variables], dtype=float)
         return variables
 
     def _initialize_cons(self, eq_tol=None, ieq_tol=None):
@@ -198,7 +887,8 @@ class EgoboxEgorDriver(Driver):
                     n_cstr += 1
                 else:
                     raise ValueError(
-                        f"Constraint {lower[k]} < g(x) < {upper[k]} not handled by Egor driver"
+                        f"Constraint {lower[k]} < g(x) < {upper[k]} not handled by"
+                        " Egor driver"
                     )
         return n_cstr
 
@@ -223,45 +913,64 @@ class EgoboxEgorDriver(Driver):
         res = np.zeros((points.shape[0], 1 + self.n_cstr))
         model = self._problem().model
 
-        for k, point in enumerate(points):
-            try:
-                # Pass in new parameters
-                i = 0
-
-                for name, meta in self._designvars.items():
-                    size = meta["size"]
-                    self.set_design_var(name, point[i : i + size])
-                    i += size
-
-                # Execute the model
-                with RecordingDebugging(
-                    self.options["optimizer"], self.iter_count, self
-                ) as _:
-                    self.iter_count += 1
-                    try:
-                        model.run_solve_nonlinear()
-
-                    # Let the optimizer try to handle the error
-                    except AnalysisError:
-                        model._clear_iprint()
-
-                # Get the objective function evaluation - single obj support
-                for obj in self.get_objective_values().values():
-                    res[k, 0] = obj
-
-                # Get the constraint evaluations
-                j = 1
-                for con_res in self.get_constraint_values().values():
-                    # Make sure con_res is array_like
-                    con_res = to_list(con_res, 1)
-                    # Perform mapping
-                    for i, _ in enumerate(con_res):
-                        res[k, j + i] = con_res[i]
-                    j += 1
+        stage = self._get_optim_stage(self._n_calls)
+        publish_optim_stage(model, stage)
+        self._n_calls += 1
 
-            except Exception as msg:
-                tb = traceback.format_exc()
-                print("Exception: %s" % str(msg))
-                print(70 * "=", tb, 70 * "=")
+        # already evaluated points are taken from the cache, points of the batch
+        # identical to a previous one are evaluated once
+        cache = self.eval_cache
+        todo = []
+        duplicates = {}
+        first = {}
+        for k, point in enumerate(points):
+            if cache is None:
+                todo.append(k)
+                continue
+            h = cache._hash(point)
+            if h in first:
+                duplicates[k] = first[h]
+                cache.hits += 1
+                continue
+            row = cache.get(point)
+            if row is None:
+                first[h] = k
+                todo.append(k)
+            else:
+                res[k] = row
+
+        if self._pool is not None:
+            # replicas are not recorded, only the iteration count is kept up to date
+            if self._replicas is None:
+                results = self._pool.map(
+                    _evaluate_process_replica,
+                    points[todo],
+                    [self.n_cstr] * len(todo),
+                    [stage] * len(todo),
+                )
+            else:
+                results = self._pool.map(
+                    self._evaluate_thread_replica, points[todo], [stage] * len(todo)
+                )
+            successes = []
+            for k, (row, success) in zip(todo, results):
+                res[k] = row
+                successes.append(success)
+            self.iter_count += len(todo)
+        else:
+            successes = [self._evaluate_point(points[k], res[k]) for k in todo]
+        self.n_failures += successes.count(False)
+        for k, j in duplicates.items():
+            res[k] = res[j]
+
+        if cache is not None:
+            # failed evaluations are not cached to be retried
+            for k, success in zip(todo, successes):
+                if success:
+                    cache.add(points[k], res[k])
+            self._save_eval_cache()
+
+        if self._checkpoint is not None:
+            self._checkpoint.append(points, res, self._n_calls)
 
         return res
@@ -4,6 +4,13 @@ import traceback
 from openmdao.core.driver import Driver, RecordingDebugging
 from openmdao.core.analysis_error import AnalysisError
 
+from openmdao_extensions.async_recording import async_recording
+from openmdao_extensions.scatter_maps import (
+    compile_scatter_maps,
+    get_design_var_bounds,
+    set_design_point,
+)
+
 ONERASEGO_NOT_INSTALLED = False
 try:
     from segomoe.sego_defs import get_sego_options, ExitStatus
@@ -64,6 +71,22 @@ class OneraSegoDriver(Driver):
             values=["SEGOMOE"],
             desc="Name of optimizers to use",
         )
+        self.options.declare(
+            "async_recording",
+            default=False,
+            types=bool,
+            desc="record iterations from a background writer thread, case data being"
+            " buffered in memory and written in batches, every case being written"
+            " when the run exits",
+        )
+        self.options.declare(
+            "recording_queue_size",
+            default=100,
+            types=int,
+            lower=1,
+            desc="maximum number of cases buffered by asynchronous recording,"
+            " recording blocks when the writer falls behind",
+        )
 
     def _setup_driver(self, problem):
         super(OneraSegoDriver, self)._setup_driver(problem)
@@ -87,6 +110,14 @@ class OneraSegoDriver(Driver):
             Dictionary to define specific tolerance for ieq constraints
             {'[groupName]': [tol]} Default tol = 1e-5
         """
+        with async_recording(
+            self,
+            self.options["async_recording"],
+            self.options["recording_queue_size"],
+        ):
+            return self._optimize(path_hs, eq_tol, ieq_tol)
+
+    def _optimize(self, path_hs, eq_tol, ieq_tol):
         model = self._problem().model
 
         path_hs = ""
@@ -115,6 +146,9 @@ class OneraSegoDriver(Driver):
         # Format constraints to suit segomoe implementation
         self._initialize_cons()
 
+        # per evaluation transfers are vectorized
+        self._initialize_maps()
+
         # Format option dictionary to suit SEGO implementation
         optim_settings = {}
         for opt, opt_dict in get_sego_options().items():
@@ -162,12 +196,8 @@ class OneraSegoDriver(Driver):
         # exit_flag, x_best, obj_best, dt_opt = sego.run_optim(
         exit_flag, x_best, _, _ = sego.run_optim(n_iter=n_iter)
 
-        # Set optimal parameters
-        i = 0
-        for name, meta in self._designvars.items():
-            size = meta["size"]
-            self.set_design_var(name, x_best[0][i : i + size])
-            i += size
+        # Set optimal parameters, as evaluated
+        set_design_point(self, np.asarray(x_best[0]), self._scatter_maps)
 
         with RecordingDebugging(
             self.options["optimizer"], self.iter_count, self
@@ -184,30 +214,18 @@ class OneraSegoDriver(Driver):
         return self.exit_flag
 
     def _initialize_vars(self):
+        # design points are in driver scaling and units
+        bounds = get_design_var_bounds(self)
         variables = []
-        param_meta = self._designvars
-        for name, meta in param_meta.items():
+        for name, meta in self._designvars.items():
+            lower, upper = bounds[name]
             if meta["size"] > 1:
-                if np.isscalar(meta["lower"]):
-                    variables += [
-                        {
-                            "name": name + "_" + str(i),
-                            "lb": meta["lower"],
-                            "ub": meta["upper"],
-                        }
-                        for i in range(meta["size"])
-                    ]
-                else:
-                    variables += [
-                        {
-                            "name": name + "_" + str(i),
-                            "lb": meta["lower"][i],
-                            "ub": meta["lower"][i],
-                        }
-                        for i in range(meta["size"])
-                    ]
+                variables += [
+                    {"name": name + "_" + str(i), "lb": lower[i], "ub": upper[i]}
+                    for i in range(meta["size"])
+                ]
             else:
-                variables += [{"name": name, "lb": meta["lower"], "ub": meta["upper"]}]
+                variables += [{"name": name, "lb": lower[0], "ub": upper[0]}]
         self._sego_vars = variables
 
     def _initialize_cons(self, eq_tol=None, ieq_tol=None):
@@ -300,6 +318,24 @@ class OneraSegoDriver(Driver):
                     self._n_mapped_con += 2
             self._map_con[name] = index_list
 
+    def _initialize_maps(self):
+        """
+        Compile scatter maps of design variables and the gather map of responses.
+
+        Entry k of the response vector given to SEGOMOE is entry _res_gather[k] of the
+        objective then constraint values in _map_con order.
+        """
+        names = list(self._objs) + list(self._map_con)
+        self._scatter_maps = compile_scatter_maps(self, names)
+
+        self._res_gather = np.zeros(1 + self._n_mapped_con, dtype=int)
+        offset = self._objs[names[0]]["size"]
+        for name, con_indices in self._map_con.items():
+            for i, con_index in enumerate(con_indices):
+                # Double sided inequality constraint -> duplicate response
+                self._res_gather[con_index] = offset + i
+            offset += self._cons[name]["size"]
+
     def _objfunc(self, point):
         """
         Function that evaluates and returns the objective function and the
@@ -324,12 +360,7 @@ class OneraSegoDriver(Driver):
 
         try:
             # Pass in new parameters
-            i = 0
-
-            for name, meta in self._designvars.items():
-                size = meta["size"]
-                self.set_design_var(name, point[i : i + size])
-                i += size
+            set_design_point(self, point, self._scatter_maps)
 
             # Execute the model
             with RecordingDebugging(
@@ -344,22 +375,25 @@ class OneraSegoDriver(Driver):
                     model._clear_iprint()
                     fail = True
 
-            # Get the objective function evaluation - single obj support
-            for name, obj in self.get_objective_values().items():
-                res[0] = obj
-
-            # Get the constraint evaluations:
-            for name, con_res in self.get_constraint_values().items():
-                # Make sure con_res is array_like
-                con_res = to_list(con_res, len(self._map_con[name]))
-                # Perform mapping
-                for i, con_index in enumerate(self._map_con[name]):
-                    if isinstance(con_index, list):
-                        # Double sided inequality constraint -> duplicate response
-                        for k in con_index:
-                            res[k] = con_res[i]
-                    else:
-                        res[con_index] = con_res[i]
+            if self._scatter_maps is not None:
+                res[:] = self._scatter_maps.get_responses()[self._res_gather]
+            else:
+                # Get the objective function evaluation - single obj support
+                for name, obj in self.get_objective_values().items():
+                    res[0] = obj
+
+                # Get the constraint evaluations:
+                for name, con_res in self.get_constraint_values().items():
+                    # Make sure con_res is array_like
+                    con_res = to_list(con_res, len(self._map_con[name]))
+                    # Perform mapping
+                    for i, con_index in enumerate(self._map_con[name]):
+                        if isinstance(con_index, list):
+                            # Double sided inequality constraint -> duplicate response
+                            for k in con_index:
+                                res[k] = con_res[i]
+                        else:
+                            res[con_index] = con_res[i]
 
         except Exception as msg:
             tb = traceback.format_exc()
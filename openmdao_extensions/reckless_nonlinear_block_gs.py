@@ -1,13 +1,300 @@
 """Define the NonlinearBlockGS class."""
 
 import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from fnmatch import fnmatchcase
+
+import networkx as nx
 import numpy as np
 
 from openmdao.core.analysis_error import AnalysisError
 from openmdao.recorders.recording_iteration_stack import Recording
-from openmdao.api import NonlinearBlockGS
+from openmdao.api import Group, NonlinearBlockGS
+from openmdao.utils.mpi import MPI
 from openmdao import __version__ as openmdao_version
 
+from openmdao_extensions.state_cache import SolveMemo, WarmStartCache
+
+# Vector views layout changed in 3.38 then 3.40, resolve it once at import
+if openmdao_version > "3.39.0":
+    _VIEWS_LAYOUT = "vecdata"
+elif openmdao_version > "3.37.0":
+    _VIEWS_LAYOUT = "tuple"
+else:
+    _VIEWS_LAYOUT = "array"
+
+CONVRG_NORMS = ["l2", "linf", "norm_change", "pointwise"]
+
+# Stages of an outer optimization published by drivers, see publish_optim_stage
+OPTIM_STAGES = ["doe", "exploration", "exploitation", "final"]
+
+
+def publish_optim_stage(model, stage):
+    """
+    Publish the stage of the outer optimization to RecklessNonlinearBlockGS solvers.
+
+    Parameters
+    ----------
+    model : <System>
+        model whose solvers (of any subsystem) are notified.
+    stage : str or None
+        one of OPTIM_STAGES, None when not optimizing.
+    """
+    for system in model.system_iter(include_self=True, recurse=True):
+        if isinstance(system.nonlinear_solver, RecklessNonlinearBlockGS):
+            system.nonlinear_solver.set_optim_stage(stage)
+
+
+def _check_convrg_vars(name, value):
+    if isinstance(value, str) and value != "auto":
+        raise ValueError(
+            "Option '{}' should be a list of variable names or 'auto',"
+            " found '{}'.".format(name, value)
+        )
+
+
+def _check_rtol_schedule(name, value):
+    for stage in value:
+        if stage not in OPTIM_STAGES[:-1]:
+            raise ValueError(
+                "Option '{}' stage '{}' unknown, should be one of {}.".format(
+                    name, stage, OPTIM_STAGES[:-1]
+                )
+            )
+
+
+def _has_recorders(system):
+    """Return whether the system, its subsystems or their solvers have recorders"""
+    for subsys in system.system_iter(include_self=True, recurse=True):
+        solvers = [subsys.nonlinear_solver, subsys.linear_solver]
+        solvers.append(getattr(subsys.nonlinear_solver, "linesearch", None))
+        if subsys._rec_mgr.has_recorders() or any(
+            solver is not None and solver._rec_mgr.has_recorders() for solver in solvers
+        ):
+            return True
+    return False
+
+
+def _nonzero(values):
+    return np.where(values == 0.0, 1.0, values)
+
+
+def _gmres(matvec, b, rtol, maxiter):
+    """
+    Solve the linear system matvec(x) = b with GMRES from x = 0, without restart.
+
+    Parameters
+    ----------
+    matvec : callable
+        linear operator product.
+    b : ndarray
+        right-hand side.
+    rtol : float
+        residual norm reduction to achieve.
+    maxiter : int
+        maximum dimension of the Krylov subspace.
+
+    Returns
+    -------
+    ndarray
+        approximate solution.
+    """
+    beta = np.linalg.norm(b)
+    if beta == 0.0:
+        return np.zeros_like(b)
+
+    m = min(maxiter, b.size)
+    basis = np.zeros((m + 1, b.size))
+    hessenberg = np.zeros((m + 1, m))
+    basis[0] = b / beta
+    for j in range(m):
+        w = matvec(basis[j])
+        # modified Gram-Schmidt orthogonalization
+        for i in range(j + 1):
+            hessenberg[i, j] = np.dot(w, basis[i])
+            w -= hessenberg[i, j] * basis[i]
+        hessenberg[j + 1, j] = np.linalg.norm(w)
+
+        rhs = np.zeros(j + 2)
+        rhs[0] = beta
+        h = hessenberg[: j + 2, : j + 1]
+        y = np.linalg.lstsq(h, rhs, rcond=None)[0]
+        if (
+            np.linalg.norm(h.dot(y) - rhs) <= rtol * beta
+            or hessenberg[j + 1, j] <= 1e-14 * beta
+        ):
+            break
+        basis[j + 1] = w / hessenberg[j + 1, j]
+    return basis[: j + 1].T.dot(y)
+
+
+class AndersonMixer(object):
+    """
+    Anderson mixing of fixed-point iterates x -> g(x) on a given subspace.
+
+    History of differences of iterates and of fixed-point residuals f = g(x) - x
+    is kept in preallocated arrays of depth rows.
+
+    Attributes
+    ----------
+    depth: int
+        Maximum number of previous iterates used to compute the mixing.
+    regularization: float
+        Tikhonov regularization factor, relative to the history squared norm.
+    restart_ratio: float
+        History is restarted when fixed-point residual norm does not decrease
+        at least by that factor between two iterations (stagnation).
+    """
+
+    def __init__(self, depth=5, regularization=1e-10, restart_ratio=1.0):
+        self.depth = depth
+        self.regularization = regularization
+        self.restart_ratio = restart_ratio
+        self.reset()
+
+    def reset(self):
+        """Forget every stored iterate."""
+        self._delta_f = None
+        self._delta_g = None
+        self._f = None
+        self._g = None
+        self._fnorm = None
+        self._count = 0
+        self.restarts = 0
+
+    def restart(self):
+        """Forget history of differences, last iterate is kept."""
+        self._count = 0
+        self.restarts += 1
+
+    def update(self, x, g):
+        """
+        Compute the next iterate given the current one and its fixed-point image.
+
+        Parameters
+        ----------
+        x : ndarray
+            current iterate.
+        g : ndarray
+            fixed-point map value at x.
+
+        Returns
+        -------
+        ndarray
+            next iterate.
+        """
+        f = g - x
+        fnorm = np.linalg.norm(f)
+        if self._f is None:
+            self._delta_f = np.zeros((self.depth, f.size))
+            self._delta_g = np.zeros((self.depth, f.size))
+        elif fnorm > self.restart_ratio * self._fnorm:
+            self.restart()
+        else:
+            row = self._count % self.depth
+            np.subtract(f, self._f, out=self._delta_f[row])
+            np.subtract(g, self._g, out=self._delta_g[row])
+            self._count += 1
+        self._f = f
+        self._g = g.copy()
+        self._fnorm = fnorm
+
+        m = min(self._count, self.depth)
+        if m == 0:
+            return g
+
+        delta_f = self._delta_f[:m]
+        gram = delta_f.dot(delta_f.T)
+        scale = np.trace(gram)
+        if scale == 0.0:
+            return g
+        gram[np.diag_indices_from(gram)] += self.regularization * scale
+        try:
+            gamma = np.linalg.solve(gram, delta_f.dot(f))
+        except np.linalg.LinAlgError:
+            self.restart()
+            return g
+        return g - gamma.dot(self._delta_g[:m])
+
+
+class ConvergenceHistory(object):
+    """
+    Ring buffer of solver iterations kept in preallocated arrays.
+
+    Attributes
+    ----------
+    size: int
+        Maximum number of iterations kept, older ones being overwritten.
+    """
+
+    def __init__(self, size, nbvars):
+        self.size = size
+        self._solve = np.zeros(size, dtype=int)
+        self._iteration = np.zeros(size, dtype=int)
+        self._norm = np.zeros(size)
+        self._ratio = np.zeros(size)
+        self._rerrs = np.zeros((size, nbvars))
+        self._time = np.zeros(size)
+        self._count = 0
+
+    def __len__(self):
+        return min(self._count, self.size)
+
+    def append(self, solve, iteration, norm, ratio, rerrs, wall_time):
+        """
+        Record one iteration, overwriting the oldest one when the buffer is full.
+
+        Parameters
+        ----------
+        solve : int
+            index of the solve.
+        iteration : int
+            iteration count within the solve.
+        norm : float
+            residual norm.
+        ratio : float
+            relative error.
+        rerrs : ndarray or None
+            relative error of each convergence variable.
+        wall_time : float
+            wall time of the iteration sweep in seconds.
+        """
+        i = self._count % self.size
+        self._solve[i] = solve
+        self._iteration[i] = iteration
+        self._norm[i] = norm
+        self._ratio[i] = ratio
+        if rerrs is not None:
+            self._rerrs[i] = rerrs
+        self._time[i] = wall_time
+        self._count += 1
+
+    def get(self):
+        """
+        Get recorded iterations, oldest first.
+
+        Returns
+        -------
+        dict
+            arrays of solve index, iteration, norm, ratio, rerrs (relative error of each
+            convergence variable, one column per variable) and time (sweep wall time).
+        """
+        if self._count <= self.size:
+            order = np.arange(self._count)
+        else:
+            order = np.roll(np.arange(self.size), -(self._count % self.size))
+        return {
+            "solve": self._solve[order],
+            "iteration": self._iteration[order],
+            "norm": self._norm[order],
+            "ratio": self._ratio[order],
+            "rerrs": self._rerrs[order],
+            "time": self._time[order],
+        }
+
 
 class RecklessNonlinearBlockGS(NonlinearBlockGS):
     """
@@ -22,10 +309,97 @@ class RecklessNonlinearBlockGS(NonlinearBlockGS):
     ----------
     _convrg_vars: list of string
         List of absolute variable names used to compute relative error and control
-        solver convergence.
-    _convrg_rtols: list of float
-        List of relative error tolerance values for each variables of _convrg_vars. If not set, rtol
-        value is used for all specified variables. Only used if _convrg_vars is set.
+        solver convergence. Resolved from the coupling graph at setup in auto mode.
+    _convrg_rtols: ndarray
+        Relative error tolerance values for each variables of _convrg_vars. If not set,
+        rtol value is used for all specified variables. Only used if _convrg_vars is
+        set.
+    _convrg_idxs: ndarray of int
+        Indices of _convrg_vars entries owned by the current process in the flat
+        output/residual vectors of the system, variables being concatenated in
+        _convrg_vars order.
+    _convrg_local_idxs: ndarray of int
+        Indices of all local _convrg_vars entries, owned or not, in the flat output
+        vector.
+    _convrg_vids: ndarray of int
+        Index in _convrg_vars of the variable of each gathered _convrg_idxs entry.
+    _convrg_key: tuple of string
+        Convergence variables the index map was computed for.
+    _convrg_atols: ndarray
+        Absolute error tolerance values for each variables of _convrg_vars.
+    _rtol: float
+        Relative tolerance regarding the current optimization stage.
+    optim_stage: str or None
+        Stage of the outer optimization published by the driver.
+    _convrg_kinds: dict
+        For each kind of norm used by _convrg_vars, mask of the variables using it.
+    _aerrs: ndarray
+        Absolute error of each variable of _convrg_vars at the current iteration.
+    _rerrs: ndarray
+        Relative error of each variable of _convrg_vars at the current iteration.
+    _prev_values: ndarray or None
+        Norm of values of each variable of _convrg_vars at the previous iteration,
+        only used with norm_change norm.
+    _anderson: AndersonMixer or None
+        Anderson mixer acting on _convrg_vars entries (whole outputs if not set),
+        only used if use_anderson option is set.
+    _sweep_stages: list of list of <System> or None
+        Subsystems grouped by stages: subsystems of a stage are executed concurrently,
+        stages are executed sequentially. None in plain Gauss-Seidel sweep mode
+        when subsystem skipping is disabled.
+    _executor: ThreadPoolExecutor or None
+        Thread pool used to execute subsystems of a stage concurrently.
+    _subsys_index: dict
+        Position of each direct subsystem in declaration order.
+    _subsys_vids: ndarray of int
+        Position of the subsystem of each entry of the flat output vector.
+    _subsys_coupling: ndarray
+        Adjacency matrix of subsystems, 1 when the column subsystem depends on the
+        row one.
+    _subsys_cycles: list of list of int
+        Positions of subsystems of each feedback cycle, cycles in execution order.
+    _subsys_times: ndarray or None
+        Wall time of each subsystem during the current solve, None if not collected.
+    _subsys_changes: list of ndarray
+        Output change of each subsystem after each sweep of the current solve.
+    _skip_maps: dict
+        For each subsystem name, indices of its inputs in the flat input vector of the
+        system, input variable index of each of those entries and number of input
+        variables. Only used if skip_rtol option is set.
+    _skip_snapshots: dict
+        For each subsystem name, its input values at its last execution.
+    skip_counts: dict
+        For each subsystem name, number of executions skipped during the last solve.
+    _design_in_idxs: ndarray of int
+        Indices in the flat input vector of the system of inputs connected from outside.
+    _design_out_idxs: ndarray of int
+        Indices in the flat output vector of the system of outputs of subsystems
+        without inputs (independent variables).
+    _state_idxs: ndarray of int
+        Indices in the flat output vector of the system of the other outputs.
+    _warm_start: WarmStartCache or None
+        Store of converged states, only used if warm_start_size option is set.
+    memo: SolveMemo or None
+        Store of converged states restored at same design points, only used if
+        memo_size option is set.
+    _design_point: ndarray or None
+        Design point of the current solve.
+    _history: ConvergenceHistory or None
+        Iterations history, only used if history_size option is set.
+    _solve_count: int
+        Number of solves since setup.
+    _contraction_errors: deque
+        Residual norms of last iterations used to estimate the contraction factor.
+    _contraction: float or None
+        Last estimated contraction factor of the fixed-point iteration.
+    _newton_x: ndarray or None
+        Convergence variables values the last sweep started from when Newton-Krylov
+        steps are used, None when sweeping.
+    newton_steps: int
+        Number of Newton-Krylov steps done during the last solve.
+    _fast_path: bool
+        Whether the current solve is a plain NonlinearBlockGS solve, no option of this
+        solver being enabled.
     """
 
     SOLVER = "NL: RNLBGS"
@@ -43,6 +417,42 @@ class RecklessNonlinearBlockGS(NonlinearBlockGS):
 
         self._convrg_vars = None
         self._convrg_rtols = None
+        self._convrg_idxs = None
+        self._convrg_local_idxs = None
+        self._convrg_vids = None
+        self._convrg_key = None
+        self._convrg_atols = None
+        self._rtol = None
+        self._convrg_kinds = {}
+        self.optim_stage = None
+        self._aerrs = None
+        self._rerrs = None
+        self._prev_values = None
+        self._anderson = None
+        self._sweep_stages = None
+        self._executor = None
+        self._skip_maps = {}
+        self._skip_snapshots = {}
+        self.skip_counts = {}
+        self._subsys_index = {}
+        self._subsys_vids = None
+        self._subsys_coupling = None
+        self._subsys_cycles = None
+        self._subsys_times = None
+        self._subsys_changes = []
+        self._design_in_idxs = None
+        self._design_out_idxs = None
+        self._state_idxs = None
+        self._warm_start = None
+        self.memo = None
+        self._design_point = None
+        self._history = None
+        self._solve_count = 0
+        self._contraction_errors = deque()
+        self._contraction = None
+        self._newton_x = None
+        self.newton_steps = 0
+        self._fast_path = False
 
     def _declare_options(self):
         """
@@ -51,9 +461,26 @@ class RecklessNonlinearBlockGS(NonlinearBlockGS):
         super(RecklessNonlinearBlockGS, self)._declare_options()
         self.options.declare(
             "convrg_vars",
+            types=(list, str),
+            default=[],
+            check_valid=_check_convrg_vars,
+            desc="list of variables (names) used by relative error criterium, or 'auto'"
+            " to select outputs closing feedback loops between subsystems at setup"
+            " (see convrg_patterns and convrg_exclude_tags options).",
+        )
+        self.options.declare(
+            "convrg_patterns",
             types=list,
             default=[],
-            desc="list of variables (names) used by relative error criterium.",
+            desc="list of glob patterns of absolute output names, when set only"
+            " matching outputs are selected in auto convrg_vars mode",
+        )
+        self.options.declare(
+            "convrg_exclude_tags",
+            types=list,
+            default=["noisy"],
+            desc="outputs tagged with one of these tags are not selected in auto"
+            " convrg_vars mode",
         )
         self.options.declare(
             "convrg_rtols",
@@ -62,78 +489,800 @@ class RecklessNonlinearBlockGS(NonlinearBlockGS):
             desc="list of relative error tolerances corresponding to each"
             " variable specified in convrg_vars option (rtol is used otherwise)",
         )
+        self.options.declare(
+            "convrg_atols",
+            types=list,
+            default=[],
+            desc="list of absolute error tolerances corresponding to each"
+            " variable specified in convrg_vars option (atol is used otherwise)",
+        )
+        self.options.declare(
+            "convrg_norms",
+            types=list,
+            default=[],
+            desc="list of norms used to compute errors of each variable specified in"
+            " convrg_vars option, one of " + ", ".join(CONVRG_NORMS) + " (l2 is used"
+            " otherwise). l2 and linf: norm of residual (change between sweeps),"
+            " relative to the same norm of the value; norm_change: change of l2 norm of"
+            " the value between sweeps; pointwise: largest residual relative to the"
+            " value of each entry.",
+        )
+        self.options.declare(
+            "use_anderson",
+            types=bool,
+            default=False,
+            desc="set to True to use Anderson acceleration restricted to convrg_vars"
+            " (all outputs if convrg_vars is not set)",
+        )
+        self.options.declare(
+            "anderson_depth",
+            types=int,
+            default=5,
+            lower=1,
+            desc="number of previous iterates used by Anderson acceleration",
+        )
+        self.options.declare(
+            "anderson_regularization",
+            default=1e-10,
+            lower=0.0,
+            desc="Tikhonov regularization factor of Anderson least-squares problem",
+        )
+        self.options.declare(
+            "anderson_restart_ratio",
+            default=1.0,
+            lower=0.0,
+            desc="Anderson history is restarted when the fixed-point residual norm"
+            " is not reduced by this factor between iterations (stagnation)",
+        )
+        self.options.declare(
+            "sweep_mode",
+            default="gauss_seidel",
+            values=["gauss_seidel", "jacobi", "hybrid"],
+            desc="gauss_seidel: subsystems are executed sequentially; jacobi: all"
+            " subsystems are executed concurrently using previous iterate inputs;"
+            " hybrid: consecutive subsystems independent of each other are executed"
+            " concurrently, Gauss-Seidel ordering being kept otherwise. Concurrently"
+            " executed subsystems and their solvers cannot have recorders",
+        )
+        self.options.declare(
+            "sweep_workers",
+            types=int,
+            default=None,
+            allow_none=True,
+            lower=1,
+            desc="maximum number of threads used in jacobi or hybrid sweep modes"
+            " (number of subsystems by default)",
+        )
+        self.options.declare(
+            "subsys_stats",
+            types=bool,
+            default=False,
+            desc="set to True to collect wall time and output change of each"
+            " subsystem at each iteration, see get_subsystem_stats()",
+        )
+        self.options.declare(
+            "adaptive_order",
+            types=bool,
+            default=False,
+            desc="set to True to reorder subsystems of each feedback cycle after each"
+            " solve in gauss_seidel sweep mode regarding collected subsystem stats:"
+            " subsystems whose outputs settle the fastest then the most coupled ones"
+            " are executed first",
+        )
+        self.options.declare(
+            "skip_rtol",
+            default=None,
+            allow_none=True,
+            lower=0.0,
+            desc="when set, a subsystem is not executed if the relative change of each"
+            " of its input variables since its last execution is below this tolerance"
+            " (should be tighter than solver tolerances)",
+        )
+        self.options.declare(
+            "warm_start_size",
+            types=int,
+            default=0,
+            lower=0,
+            desc="number of converged states kept to seed a new solve from the state"
+            " of the nearest previous design point (0 means no warm start, not"
+            " available when the system has discrete variables)",
+        )
+        self.options.declare(
+            "memo_size",
+            types=int,
+            default=0,
+            lower=0,
+            desc="number of converged states kept to be restored without running any"
+            " subsystem when the solver is run again at the same design point (0 means"
+            " no memoization, not available when the system has discrete variables)",
+        )
+        self.options.declare(
+            "memo_tol",
+            default=0.0,
+            lower=0.0,
+            desc="quantization step of design point values below which design points"
+            " are considered as the same one by memoization (0 means exact match)",
+        )
+        self.options.declare(
+            "history_size",
+            types=int,
+            default=0,
+            lower=0,
+            desc="number of last iterations kept in convergence history, see"
+            " get_history() (0 means no history)",
+        )
+        self.options.declare(
+            "contraction_window",
+            types=int,
+            default=0,
+            lower=0,
+            desc="number of last iterations used to estimate the contraction factor of"
+            " the iteration, which enables to stop as soon as the extrapolated error"
+            " meets tolerances and to bail out when the solver diverges or cannot"
+            " converge within maxiter (0 means no estimation)",
+        )
+        self.options.declare(
+            "rtol_schedule",
+            types=dict,
+            default={},
+            check_valid=_check_rtol_schedule,
+            desc="factor applied to rtol and convrg_rtols for each stage of an outer"
+            " optimization published by the driver (one of "
+            + ", ".join(OPTIM_STAGES[:-1])
+            + "), e.g. {'doe': 100.0, 'exploration': 10.0}. Tolerances are unchanged"
+            " at final stage or when no stage is published",
+        )
+        self.options.declare(
+            "newton_switch",
+            default=None,
+            allow_none=True,
+            lower=0.0,
+            desc="estimated contraction factor above which Newton-Krylov steps on the"
+            " reduced convrg_vars coupling system are used instead of sweeps, Jacobian"
+            " products being computed by finite differences of the sweep. Sweeps are"
+            " resumed when a Newton step does not reduce the residual. convrg_vars"
+            " should be feedback outputs (see auto mode), requires contraction_window."
+            " maxiter"
+            " limits the number of sweeps, Jacobian products included",
+        )
+        self.options.declare(
+            "newton_krylov_maxiter",
+            types=int,
+            default=10,
+            lower=1,
+            desc="maximum number of Jacobian products (sweeps) of a Newton-Krylov step",
+        )
+        self.options.declare(
+            "newton_krylov_rtol",
+            default=1e-3,
+            lower=0.0,
+            desc="relative tolerance of the linear solve of a Newton-Krylov step",
+        )
+        self.options.declare(
+            "newton_fd_step",
+            default=1e-7,
+            lower=0.0,
+            desc="relative finite difference step of Jacobian products",
+        )
+        self.options.declare(
+            "contraction_max",
+            default=1.0,
+            lower=0.0,
+            desc="estimated contraction factor above which the solver is considered"
+            " as diverging or stagnating",
+        )
+
+    def _setup_solvers(self, system, depth):
+        """
+        Assign system instance, set depth and compute convergence variables index map.
+
+        Parameters
+        ----------
+        system : <System>
+            pointer to the owning system.
+        depth : int
+            depth of the current system (already incremented).
+        """
+        super(RecklessNonlinearBlockGS, self)._setup_solvers(system, depth)
+
+        if self.options["use_anderson"] and self.options["use_aitken"]:
+            raise RuntimeError(
+                "{}: Anderson and Aitken accelerations cannot be used together.".format(
+                    self.msginfo
+                )
+            )
+        if self.options["skip_rtol"] is not None and (
+            self.options["use_anderson"] or self.options["use_aitken"]
+        ):
+            raise RuntimeError(
+                "{}: Subsystem skipping cannot be used with Anderson or Aitken"
+                " accelerations.".format(self.msginfo)
+            )
+
+        if self.options["newton_switch"] is not None:
+            if not self.options["contraction_window"]:
+                raise RuntimeError(
+                    "{}: Newton-Krylov switching requires contraction_window to be"
+                    " set.".format(self.msginfo)
+                )
+            if self.options["use_anderson"] or self.options["use_aitken"]:
+                raise RuntimeError(
+                    "{}: Newton-Krylov switching cannot be used with Anderson or Aitken"
+                    " accelerations.".format(self.msginfo)
+                )
+
+        # inner products of Anderson mixing and GMRES are not reduced over processes
+        if system.comm.size > 1 and (
+            self.options["use_anderson"] or self.options["newton_switch"] is not None
+        ):
+            raise RuntimeError(
+                "{}: Anderson acceleration and Newton-Krylov switching cannot be used"
+                " when the system is distributed over several processes.".format(
+                    self.msginfo
+                )
+            )
+
+        self._convrg_key = None
+        self._history = None
+        self._solve_count = 0
+        # execution order is used to select feedback outputs
+        self._setup_sweep_stages()
+        if system._outputs is not None:
+            self._setup_convrg_map()
+            self._setup_skip_maps()
+            self._setup_design_maps()
+            self._setup_subsys_stats()
+
+    def _setup_convrg_map(self):
+        """
+        Resolve convrg_vars names once into indices of the flat output/residual vectors.
+
+        Outputs and residuals vectors share the same layout, so that one index map
+        is used to gather both of them. Under MPI, only entries owned by the current
+        process are gathered for the norms, so that duplicated variables are counted
+        once when partial sums are reduced over processes.
+        """
+        system = self._system()
+        if self.options["convrg_vars"] == "auto":
+            names = self._get_feedback_outputs()
+        else:
+            names = self.options["convrg_vars"]
+        allprocs_meta = system._var_allprocs_abs2meta["output"]
+
+        for name in names:
+            if name not in allprocs_meta:
+                raise RuntimeError(
+                    "Convergence variable '{}' not found in outputs of system"
+                    " '{}'.".format(name, system.pathname)
+                )
+
+        rank = system.comm.rank
+        local = [name for name in names if name in system._outputs._views]
+        owned = [
+            i
+            for i, name in enumerate(names)
+            if name in system._outputs._views
+            and (
+                allprocs_meta[name]["distributed"] or system._owning_rank[name] == rank
+            )
+        ]
+
+        self._convrg_local_idxs, _ = self._get_flat_indices(system._outputs, local)
+        self._convrg_idxs, starts = self._get_flat_indices(
+            system._outputs, [names[i] for i in owned]
+        )
+        # variable index of each gathered entry, local sizes may be zero
+        sizes = np.diff(np.append(starts, self._convrg_idxs.size))
+        self._convrg_vids = np.repeat(np.array(owned, dtype=int), sizes)
+        self._convrg_vars = names
+        self._convrg_key = self._get_convrg_key()
+
+    def _get_convrg_key(self):
+        """Return the options the convergence variables index map depends on"""
+        convrg_vars = self.options["convrg_vars"]
+        if convrg_vars == "auto":
+            return (
+                convrg_vars,
+                self.options["sweep_mode"],
+                tuple(self.options["convrg_patterns"]),
+                tuple(self.options["convrg_exclude_tags"]),
+            )
+        return tuple(convrg_vars)
+
+    def _get_feedback_outputs(self):
+        """
+        Get outputs closing feedback loops between direct subsystems of the solver.
+
+        A coupling is a feedback one when its source and target subsystems belong to
+        the same cycle of the dependency graph and the source is executed after the
+        target within a sweep (whatever the order in jacobi sweep mode), its value being
+        then lagged by one iteration.
+
+        Returns
+        -------
+        list of string
+            absolute names of selected outputs, in system outputs order.
+        """
+        system = self._system()
+        if (
+            self._sweep_stages is not None
+            and self.options["sweep_mode"] == "gauss_seidel"
+        ):
+            # subsystems may have been reordered
+            subsystems = [stage[0] for stage in self._sweep_stages]
+        else:
+            subsystems = system._subsystems_myproc
+        order = {subsys.name: i for i, subsys in enumerate(subsystems)}
+        connections = list(self._iter_subsystems_connections())
+
+        graph = nx.DiGraph()
+        graph.add_nodes_from(order)
+        graph.add_edges_from((src_sys, tgt_sys) for tgt_sys, src_sys, _ in connections)
+        cycles = {}
+        for i, comp in enumerate(nx.strongly_connected_components(graph)):
+            for name in comp:
+                cycles[name] = i
+
+        jacobi = self.options["sweep_mode"] == "jacobi"
+        feedbacks = set()
+        for tgt_sys, src_sys, src in connections:
+            if tgt_sys not in order or src_sys not in order:
+                continue
+            if cycles[tgt_sys] == cycles[src_sys] and (
+                jacobi or order[src_sys] > order[tgt_sys]
+            ):
+                feedbacks.add(src)
+
+        patterns = self.options["convrg_patterns"]
+        exclude_tags = set(self.options["convrg_exclude_tags"])
+        names = []
+        for name, meta in system._var_allprocs_abs2meta["output"].items():
+            if name not in feedbacks or exclude_tags.intersection(meta["tags"]):
+                continue
+            if patterns and not any(fnmatchcase(name, pat) for pat in patterns):
+                continue
+            names.append(name)
+        return names
+
+    def _iter_subsystems_connections(self):
+        """
+        Iterate over connections between distinct direct subsystems of the solver.
+
+        Yields
+        ------
+        tuple
+            target subsystem name, source subsystem name, source absolute name.
+        """
+        system = self._system()
+        prefix = system.pathname + "." if system.pathname else ""
+        start = len(prefix)
+
+        for tgt, src in system._conn_global_abs_in2out.items():
+            if not (tgt.startswith(prefix) and src.startswith(prefix)):
+                continue
+            tgt_sys = tgt[start:].split(".", 1)[0]
+            src_sys = src[start:].split(".", 1)[0]
+            if tgt_sys != src_sys:
+                yield tgt_sys, src_sys, src
+
+    def _get_subsystems_dependencies(self):
+        """
+        Get data dependencies between direct subsystems of the solver system.
+
+        Returns
+        -------
+        dict
+            For each subsystem name, the set of subsystem names it gets inputs from.
+        """
+        system = self._system()
+        deps = {subsys.name: set() for subsys in system._subsystems_myproc}
+        for tgt_sys, src_sys, _ in self._iter_subsystems_connections():
+            if tgt_sys in deps:
+                deps[tgt_sys].add(src_sys)
+        return deps
+
+    def _setup_sweep_stages(self):
+        """
+        Group subsystems in stages of concurrently executed subsystems from sweep_mode.
+        """
+        system = self._system()
+        mode = self.options["sweep_mode"]
+
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+        if mode == "gauss_seidel":
+            if self.options["skip_rtol"] is None and not self._use_subsys_stats():
+                self._sweep_stages = None
+            else:
+                self._sweep_stages = [[subsys] for subsys in system._subsystems_myproc]
+        elif mode == "jacobi":
+            self._sweep_stages = [list(system._subsystems_myproc)]
+        else:
+            deps = self._get_subsystems_dependencies()
+            stages = []
+            stage = []
+            for subsys in system._subsystems_myproc:
+                if any(deps[subsys.name] & {s.name for s in stage}):
+                    stages.append(stage)
+                    stage = []
+                stage.append(subsys)
+            if stage:
+                stages.append(stage)
+            self._sweep_stages = stages
+
+        # recorders and the recording iteration stack are not thread safe
+        for stage in self._sweep_stages or []:
+            if len(stage) > 1 and any(_has_recorders(subsys) for subsys in stage):
+                raise RuntimeError(
+                    "{}: Subsystems executed concurrently in {} sweep mode cannot have"
+                    " recorders, found in {}.".format(
+                        self.msginfo,
+                        mode,
+                        [subsys.name for subsys in stage if _has_recorders(subsys)],
+                    )
+                )
+
+    def _use_subsys_stats(self):
+        """Return whether subsystem stats are collected"""
+        return self.options["subsys_stats"] or self.options["adaptive_order"]
+
+    def _setup_subsys_stats(self):
+        """
+        Compute subsystem index of each output entry and feedback cycles of subsystems.
+
+        Cycles are the strongly connected components of the subsystems dependency
+        graph, in topological order, subsystems within a cycle being reordered by
+        adaptive ordering.
+        """
+        system = self._system()
+        subsystems = system._subsystems_myproc
+        self._subsys_index = {subsys.name: i for i, subsys in enumerate(subsystems)}
+        self._subsys_vids = np.zeros(system._outputs.asarray().size, dtype=int)
+        for i, subsys in enumerate(subsystems):
+            idxs, _ = self._get_flat_indices(
+                system._outputs, list(subsys._outputs._views)
+            )
+            self._subsys_vids[idxs] = i
+
+        deps = self._get_subsystems_dependencies()
+        position = self._subsys_index
+        graph = nx.DiGraph()
+        graph.add_nodes_from(position)
+        graph.add_edges_from(
+            (src, tgt) for tgt, srcs in deps.items() for src in srcs if src in position
+        )
+        self._subsys_coupling = nx.to_numpy_array(
+            graph, nodelist=[subsys.name for subsys in subsystems]
+        )
+        cond = nx.condensation(graph)
+        self._subsys_cycles = [
+            sorted(position[name] for name in cond.nodes[node]["members"])
+            for node in nx.lexicographical_topological_sort(
+                cond,
+                key=lambda node: min(
+                    position[name] for name in cond.nodes[node]["members"]
+                ),
+            )
+        ]
+
+    def _reorder_subsystems(self):
+        """
+        Reorder subsystems within feedback cycles regarding stats of the last solve.
+
+        Outputs flowing backward in the execution order are lagged by one iteration,
+        which costs more for strongly coupled outputs changing a lot. Each coupling is
+        weighted by the share of the output change of the solve of its source (the
+        first, transient change being ignored) and subsystems are ordered greedily to
+        reduce the weight of backward couplings: the subsystem whose outgoing minus
+        incoming coupling weight is the largest is executed first.
+        """
+        changes = np.array(self._subsys_changes)[1:]
+        if len(changes) < 2:
+            return
+        shares = np.mean(changes / _nonzero(changes.sum(axis=1))[:, None], axis=0)
+        # shares are rounded so that the order is stable between solves
+        shares = np.round(shares, 2)
+
+        subsystems = self._system()._subsystems_myproc
+        current = [subsystems.index(stage[0]) for stage in self._sweep_stages]
+        rank = {i: r for r, i in enumerate(current)}
+        order = []
+        for cycle in self._subsys_cycles:
+            remaining = sorted(cycle, key=rank.get)
+            while remaining:
+                sub = self._subsys_coupling[np.ix_(remaining, remaining)]
+                scores = shares[remaining] * sub.sum(axis=1) - sub.T.dot(
+                    shares[remaining]
+                )
+                order.append(remaining.pop(int(np.argmax(scores))))
+        if order != current:
+            self._sweep_stages = [[subsystems[i]] for i in order]
+            if self.options["convrg_vars"] == "auto":
+                # feedback outputs depend on execution order
+                self._convrg_key = None
+
+    def get_subsystem_stats(self):
+        """
+        Get wall time and output change of direct subsystems during the last solve.
+
+        Stats are collected when subsys_stats or adaptive_order option is set.
+
+        Returns
+        -------
+        dict or None
+            subsystem names in current execution order ("names"), total wall time of
+            each subsystem in seconds ("time") and l2 norm of the output change
+            (residual if apply_nonlinear is used) of each subsystem after the sweep of
+            each iteration ("change", one row per iteration and one column per
+            subsystem), None if stats are not collected.
+        """
+        if self._subsys_times is None:
+            return None
+        subsystems = self._system()._subsystems_myproc
+        order = [subsystems.index(stage[0]) for stage in self._sweep_stages]
+        changes = np.array(self._subsys_changes).reshape(-1, len(subsystems))
+        return {
+            "names": [subsystems[i].name for i in order],
+            "time": self._subsys_times[order],
+            "change": changes[:, order],
+        }
+
+    def _setup_skip_maps(self):
+        """
+        Resolve inputs of each subsystem into indices of the flat system input vector.
+
+        Subsystems without inputs or with discrete inputs are never skipped.
+        """
+        system = self._system()
+        self._skip_maps = {}
+        if self.options["skip_rtol"] is None:
+            return
+
+        for subsys in system._subsystems_myproc:
+            if subsys._inputs._views and not subsys._var_discrete["input"]:
+                idxs, starts = self._get_flat_indices(
+                    system._inputs, subsys._inputs._views
+                )
+                # variable index of each entry, sizes may be zero
+                sizes = np.diff(np.append(starts, idxs.size))
+                vids = np.repeat(np.arange(sizes.size), sizes)
+                self._skip_maps[subsys.name] = (idxs, vids, sizes.size)
+
+    def _setup_design_maps(self):
+        """
+        Split the system variables in design point variables and state variables.
+
+        Design point is made of inputs connected from outside the system and of outputs
+        of subsystems without inputs (typically independent variables of the model),
+        other outputs being the state of the system. Warm start and memoization are
+        disabled when the system has discrete variables, which are not part of the
+        design point nor of the state.
+        """
+        system = self._system()
+        in2out = system._conn_global_abs_in2out
+
+        design_ins = [name for name in system._inputs._views if name not in in2out]
+        design_outs = []
+        for subsys in system._subsystems_myproc:
+            if not subsys._inputs._views:
+                design_outs.extend(subsys._outputs._views)
+        design_outs = set(design_outs)
+        states = [name for name in system._outputs._views if name not in design_outs]
+
+        self._design_in_idxs, _ = self._get_flat_indices(system._inputs, design_ins)
+        self._design_out_idxs, _ = self._get_flat_indices(
+            system._outputs,
+            [name for name in system._outputs._views if name in design_outs],
+        )
+        self._state_idxs, _ = self._get_flat_indices(system._outputs, states)
+
+        discrete = system._var_allprocs_discrete
+        cacheable = (self._design_in_idxs.size + self._design_out_idxs.size) > 0
+        if discrete["input"] or discrete["output"]:
+            cacheable = False
+        size = self.options["warm_start_size"]
+        if size > 0 and cacheable:
+            self._warm_start = WarmStartCache(size)
+        else:
+            self._warm_start = None
+        size = self.options["memo_size"]
+        if size > 0 and cacheable:
+            self.memo = SolveMemo(size, self.options["memo_tol"])
+        else:
+            self.memo = None
+
+    def _restore_memo(self):
+        """
+        Restore the converged state memoized for the current design point if any.
+
+        Inputs of all subsystems are updated by transfers, no subsystem being run.
+
+        Returns
+        -------
+        bool
+            whether a converged state has been restored.
+        """
+        system = self._system()
+        if self.memo is None or system.under_approx:
+            return False
+        state = self.memo.get(self._design_point)
+        if system.comm.size > 1:
+            # every process has to restore or to solve
+            if not system.comm.allreduce(state is not None, op=MPI.LAND):
+                return False
+        elif state is None:
+            return False
+
+        system._outputs.set_val(state, self._state_idxs)
+        system._residuals.set_val(0.0)
+        for group in system.system_iter(include_self=True, recurse=True, typ=Group):
+            group._transfer("nonlinear", "fwd")
+        self._iter_count = 0
+
+        if self.options["iprint"] > 0 and (
+            system.comm.rank == 0 or os.environ.get("USE_PROC_FILES")
+        ):
+            print(self._solver_info.prefix + self.SOLVER + " Restored memoized state")
+        return True
+
+    def _get_design_point(self):
+        """
+        Get the current design point of the system.
+
+        Returns
+        -------
+        ndarray
+            values of design inputs followed by values of design outputs.
+        """
+        system = self._system()
+        return np.concatenate(
+            (
+                system._inputs.asarray()[self._design_in_idxs],
+                system._outputs.asarray()[self._design_out_idxs],
+            )
+        )
 
     def _solve(self):
         """
         Run the iterative solver.
 
-        Overrides opendmao/solvers/solver.py to implement _is_rtol_converged
+        Overrides opendmao/solvers/solver.py to implement _is_rtol_converged, the
+        NonlinearBlockGS solve being run as is when no option of this solver is enabled.
         """
+        self._fast_path = self._use_fast_path()
+        if self._fast_path:
+            return super(RecklessNonlinearBlockGS, self)._solve()
+
         maxiter = self.options["maxiter"]
         atol = self.options["atol"]
         iprint = self.options["iprint"]
 
+        system = self._system()
+        self._design_point = None
+        if (
+            self._warm_start is not None or self.memo is not None
+        ) and not system.under_complex_step:
+            self._design_point = self._get_design_point()
+            if self._restore_memo():
+                return
+
         self._mpi_print_header()
 
+        self._solve_count += 1
+        tic = time.perf_counter()
+
         self._iter_count = 0
-        self._iter_initialize()
+        # errors are computed once, a second norm_change error would be zero
+        norm0, norm = self._iter_initialize()
+        history = self._history
 
         if self._convrg_vars:
-            # get initial value of convrg_vars
-            norm, val_convrg_vars_minus1 = self._iter_get_norm()
-            ratio = 1
+            ratio = np.max(self._rerrs)
         else:
-            norm = self._iter_get_norm()
-            norm0 = norm if norm != 0.0 else 1.0
             ratio = norm / norm0
 
+        if history is not None:
+            toc = time.perf_counter()
+            history.append(
+                self._solve_count, self._iter_count, norm, ratio, self._rerrs, toc - tic
+            )
+            tic = toc
+
         self._mpi_print(self._iter_count, norm, ratio)
         is_rtol_converged = self._is_rtol_converged(ratio)
+        contraction_failure = None
 
-        while self._iter_count < maxiter and norm > atol and not is_rtol_converged:
+        while (
+            self._iter_count < maxiter
+            and norm > atol
+            and not is_rtol_converged
+            and contraction_failure is None
+        ):
             with Recording(type(self).__name__, self._iter_count, self) as rec:
                 self._single_iteration()
                 self._iter_count += 1
                 self._run_apply()
 
+                norm = self._iter_get_norm()
                 if self._convrg_vars:
-                    norm, val_convrg_vars = self._iter_get_norm()
-                    rec.abs = norm
-                    rec.rel = (
-                        np.abs(val_convrg_vars - val_convrg_vars_minus1)
-                        / val_convrg_vars_minus1
-                    )
-                    ratio = (
-                        np.abs(val_convrg_vars - val_convrg_vars_minus1)
-                        / val_convrg_vars_minus1
-                    )
-                    ratio = np.max(ratio)
-
-                    val_convrg_vars_minus1 = val_convrg_vars
+                    ratio = np.max(self._rerrs)
                 else:
-                    norm = self._iter_get_norm()
-                    # With solvers, we want to record the norm AFTER the call, but the call needs to
-                    # be wrapped in the with for stack purposes, so we locally assign  norm & norm0
-                    # into the class.
-                    rec.abs = norm
-                    rec.rel = norm / norm0
                     ratio = norm / norm0
-                    if norm0 == 0:
-                        norm0 = 1
+                # With solvers, we want to record the norm AFTER the call, but the call
+                # needs to be wrapped in the with for stack purposes, so we locally
+                # assign norm & norm0 into the class.
+                rec.abs = norm
+                rec.rel = ratio
+
+            if history is not None:
+                toc = time.perf_counter()
+                history.append(
+                    self._solve_count,
+                    self._iter_count,
+                    norm,
+                    ratio,
+                    self._rerrs,
+                    toc - tic,
+                )
+                tic = toc
 
             self._mpi_print(self._iter_count, norm, ratio)
             is_rtol_converged = self._is_rtol_converged(ratio)
+            if norm <= atol or is_rtol_converged:
+                pass
+            elif self._newton_x is not None:
+                if norm >= self._contraction_errors[-1]:
+                    # Newton step did not reduce the residual, resume sweeping
+                    self._newton_x = None
+                    self._contraction_errors.clear()
+                else:
+                    self._contraction_errors.append(norm)
+            elif self.options["contraction_window"]:
+                # errors of loop sweeps only, the first change being a transient
+                # from the initial state
+                is_rtol_converged, contraction_failure = self._check_contraction(
+                    norm, ratio
+                )
+                switch = self.options["newton_switch"]
+                if (
+                    switch is not None
+                    and self._contraction is not None
+                    and (contraction_failure is not None or self._contraction >= switch)
+                    and np.isfinite(norm)
+                    # starting sweep, one Jacobian product and closing sweep
+                    and maxiter - self._iter_count >= 3
+                ):
+                    contraction_failure = None
+                    self._start_newton()
 
-        system = self._system()
+        if (
+            self.options["adaptive_order"]
+            and self.options["sweep_mode"] == "gauss_seidel"
+            and not system.under_approx
+        ):
+            self._reorder_subsystems()
+        if (
+            self._design_point is not None
+            and not system.under_approx
+            and np.isfinite(norm)
+            and (norm <= atol or is_rtol_converged)
+        ):
+            state = system._outputs.asarray()[self._state_idxs]
+            if self._warm_start is not None:
+                self._warm_start.add(self._design_point, state)
+            # loosely converged states are not restored at later tight solves
+            if self.memo is not None and self._get_rtol_factor() == 1.0:
+                self.memo.add(self._design_point, state)
         if system.comm.rank == 0 or os.environ.get("USE_PROC_FILES"):
             prefix = self._solver_info.prefix + self.SOLVER
-            is_rtol_converged = self._is_rtol_converged(ratio)
-            # Solver terminated early because a Nan in the norm doesn't satisfy the while-loop
-            # conditionals.
+            # Solver terminated early because a Nan in the norm doesn't satisfy the
+            # while-loop conditionals.
             if np.isinf(norm) or np.isnan(norm):
                 msg = (
-                    "Solver '{}' on system '{}': residuals contain 'inf' or 'NaN' after {} "
-                    + "iterations."
+                    "Solver '{}' on system '{}': residuals contain 'inf' or 'NaN'"
+                    + " after {} iterations."
                 )
                 if iprint > -1:
                     print(
@@ -147,6 +1296,26 @@ class RecklessNonlinearBlockGS(NonlinearBlockGS):
                         msg.format(self.SOLVER, system.pathname, self._iter_count)
                     )
 
+            # Solver diverging or not able to converge within maxiter
+            elif contraction_failure is not None:
+                msg = (
+                    "Solver '{}' on system '{}' stopped after {} iterations: {}"
+                    " (estimated contraction factor {:.3g})."
+                ).format(
+                    self.SOLVER,
+                    system.pathname,
+                    self._iter_count,
+                    contraction_failure,
+                    self._contraction,
+                )
+
+                if iprint > -1:
+                    print(prefix + msg)
+
+                # Raise AnalysisError if requested.
+                if self.options["err_on_non_converge"]:
+                    raise AnalysisError(msg)
+
             # Solver hit maxiter without meeting desired tolerances.
             elif norm > atol and not is_rtol_converged:
                 msg = "Solver '{}' on system '{}' failed to converge in {} iterations."
@@ -169,6 +1338,34 @@ class RecklessNonlinearBlockGS(NonlinearBlockGS):
             elif iprint == 2:
                 print(prefix + " Converged")
 
+    def _use_fast_path(self):
+        """
+        Return whether the solve can be left to NonlinearBlockGS.
+
+        Convergence variables, accelerations and switches of this solver, per-solve
+        bookkeeping (history, contraction estimate, statistics, state caches) and
+        scheduled tolerances all have to be disabled.
+
+        Returns
+        -------
+        bool
+            whether no option of this solver is enabled.
+        """
+        options = self.options
+        return (
+            self._convrg_key == self._get_convrg_key()
+            and not self._convrg_vars
+            and not options["use_anderson"]
+            and options["skip_rtol"] is None
+            and self._sweep_stages is None
+            and not self._use_subsys_stats()
+            and self._warm_start is None
+            and self.memo is None
+            and not options["history_size"]
+            and not options["contraction_window"]
+            and self._get_rtol_factor() == 1.0
+        )
+
     def _iter_initialize(self):
         """
         Perform any necessary pre-processing operations.
@@ -180,85 +1377,567 @@ class RecklessNonlinearBlockGS(NonlinearBlockGS):
         float
             error at the first iteration.
         """
-        self._convrg_vars = self.options["convrg_vars"]
-        if self._convrg_vars and not self.options["convrg_rtols"]:
-            rtol = self.options["rtol"]
-            self._convrg_rtols = rtol * np.ones(len(self._convrg_vars))
+        if self._fast_path:
+            # state left by a previous solve with options enabled
+            self._anderson = None
+            self._newton_x = None
+            self.newton_steps = 0
+            self._history = None
+            self._subsys_times = None
+            self.skip_counts = {}
+            return super(RecklessNonlinearBlockGS, self)._iter_initialize()
+
+        if self._convrg_key != self._get_convrg_key():
+            # convrg_vars options changed since setup
+            self._setup_convrg_map()
+        self._setup_convrg_criteria()
+
+        self._contraction_errors = deque(maxlen=self.options["contraction_window"] + 1)
+        self._contraction = None
+        self._newton_x = None
+        self.newton_steps = 0
+
+        size = self.options["history_size"]
+        nbvars = len(self._convrg_vars)
+        if size == 0:
+            self._history = None
+        elif (
+            self._history is None
+            or self._history.size != size
+            or self._history._rerrs.shape[1] != nbvars
+        ):
+            self._history = ConvergenceHistory(size, nbvars)
+
+        if self.options["use_anderson"]:
+            self._anderson = AndersonMixer(
+                depth=self.options["anderson_depth"],
+                regularization=self.options["anderson_regularization"],
+                restart_ratio=self.options["anderson_restart_ratio"],
+            )
         else:
-            self._convrg_rtols = self.options["convrg_rtols"]
-            if len(self._convrg_rtols) != len(self._convrg_vars):
+            self._anderson = None
+
+        self._skip_snapshots = {}
+        self.skip_counts = {name: 0 for name in self._skip_maps}
+
+        if self._use_subsys_stats():
+            self._subsys_times = np.zeros(len(self._subsys_index))
+            self._subsys_changes = []
+        else:
+            self._subsys_times = None
+
+        system = self._system()
+        if self._warm_start is not None and self._design_point is not None:
+            state = self._warm_start.nearest(self._design_point)
+            if state is not None:
+                system._outputs.set_val(state, self._state_idxs)
+
+        return super(RecklessNonlinearBlockGS, self)._iter_initialize()
+
+    def _check_contraction(self, norm, ratio):
+        """
+        Estimate contraction factor from last errors and check extrapolated convergence.
+
+        For a contraction of factor rho, the error with respect to the fixed point is
+        bounded by rho / (1 - rho) times the change between sweeps, and the number of
+        iterations still needed to meet tolerances is log(tol / err) / log(rho).
+
+        Parameters
+        ----------
+        norm : float
+            residual norm.
+        ratio : float
+            relative error.
+
+        Returns
+        -------
+        bool
+            whether extrapolated error meets tolerances.
+        str or None
+            failure description if the solver diverges or cannot converge within
+            maxiter.
+        """
+        errors = self._contraction_errors
+        errors.append(norm)
+        if len(errors) < errors.maxlen or errors[0] <= 0.0 or norm <= 0.0:
+            return False, None
+
+        rho = (norm / errors[0]) ** (1.0 / (len(errors) - 1))
+        self._contraction = rho
+        if rho >= self.options["contraction_max"] or rho >= 1.0:
+            return False, "diverging or stagnating"
+
+        factor = rho / (1.0 - rho)
+        with np.errstate(divide="ignore"):
+            if self._convrg_vars:
+                if np.all(
+                    (factor * self._aerrs <= self._convrg_atols)
+                    | (factor * self._rerrs <= self._convrg_rtols)
+                ):
+                    return True, None
+                gap = np.max(
+                    np.minimum(
+                        np.log(self._aerrs / self._convrg_atols),
+                        np.log(self._rerrs / self._convrg_rtols),
+                    )
+                )
+            else:
+                if (
+                    factor * norm <= self.options["atol"]
+                    or factor * ratio <= self._rtol
+                ):
+                    return True, None
+                gap = min(
+                    np.log(norm / self.options["atol"]),
+                    np.log(ratio / self._rtol),
+                )
+
+        if self._iter_count + gap / -np.log(rho) > self.options["maxiter"]:
+            return False, "not expected to converge in {} iterations".format(
+                self.options["maxiter"]
+            )
+        return False, None
+
+    def _setup_convrg_criteria(self):
+        """
+        Check and expand per-variable tolerances and norms of convrg_vars.
+        """
+        nbvars = len(self._convrg_vars)
+
+        tols = {}
+        for kind in ["rtol", "atol"]:
+            values = self.options["convrg_{}s".format(kind)]
+            if not values:
+                values = [self.options[kind]] * nbvars
+            elif len(values) != nbvars:
                 raise RuntimeError(
-                    "Convergence rtols bad size : should be {}, found {}.".format(
-                        len(self._convrg_vars), len(self._convrg_rtols)
+                    "Convergence {}s bad size : should be {}, found {}.".format(
+                        kind, nbvars, len(values)
                     )
                 )
+            tols[kind] = np.array(values, dtype=float)
+        self._rtol = self.options["rtol"] * self._get_rtol_factor()
+        self._convrg_rtols = tols["rtol"] * self._get_rtol_factor()
+        self._convrg_atols = tols["atol"]
 
-        return super(RecklessNonlinearBlockGS, self)._iter_initialize()
+        norms = self.options["convrg_norms"] or ["l2"] * nbvars
+        if len(norms) != nbvars:
+            raise RuntimeError(
+                "Convergence norms bad size : should be {}, found {}.".format(
+                    nbvars, len(norms)
+                )
+            )
+        for norm in norms:
+            if norm not in CONVRG_NORMS:
+                raise RuntimeError(
+                    "Convergence norm '{}' unknown, should be one of {}.".format(
+                        norm, CONVRG_NORMS
+                    )
+                )
+        norms = np.array(norms)
+        self._convrg_kinds = {
+            kind: norms == kind for kind in CONVRG_NORMS if np.any(norms == kind)
+        }
+
+        # not converged until errors are computed
+        self._aerrs = np.full(nbvars, np.inf)
+        self._rerrs = np.full(nbvars, np.inf)
+        self._prev_values = None
+
+    def _single_iteration(self):
+        """
+        Perform the operations in the iteration loop.
+
+        When Anderson acceleration is enabled, only the convergence variables are mixed,
+        other outputs keep their plain Gauss-Seidel values. A Newton-Krylov step is done
+        instead of a sweep once switched to.
+        """
+        if self._newton_x is not None:
+            return self._newton_iteration()
+        if self._anderson is None:
+            return super(RecklessNonlinearBlockGS, self)._single_iteration()
+
+        outputs = self._system()._outputs
+        idxs = self._convrg_local_idxs if self._convrg_vars else slice(None)
+
+        x = outputs.asarray()[idxs].copy()
+        super(RecklessNonlinearBlockGS, self)._single_iteration()
+        outputs.set_val(self._anderson.update(x, outputs.asarray()[idxs]), idxs)
+
+    def _start_newton(self):
+        """
+        Switch from sweeps to Newton-Krylov steps on convergence variables.
+
+        The sweep done from the current state starts the first Newton step, it is
+        counted as an iteration.
+        """
+        system = self._system()
+        outputs = system._outputs
+        idxs = self._convrg_local_idxs if self._convrg_vars else slice(None)
+
+        self._newton_x = outputs.asarray()[idxs].copy()
+        self._contraction_errors.clear()
+        self._contraction_errors.append(np.inf)
+        self._sweep()
+        self._iter_count += 1
+
+    def _newton_iteration(self):
+        """
+        Perform a Newton-Krylov step on the fixed-point equation G(x) - x = 0.
+
+        G is the sweep map restricted to convergence variables x, other outputs being
+        reset to the state reached by the last sweep before each evaluation. The step
+        is solved with GMRES using finite difference Jacobian products, then a sweep
+        is done from the updated values, its output change giving the residual.
+
+        Each Jacobian product is a sweep counted as an iteration, the closing sweep
+        being counted by the solve loop, so that Krylov iterations are limited to
+        the sweeps left within maxiter. When none is left, a plain sweep is done.
+
+        Input snapshots of subsystem skipping are cleared before each perturbed sweep
+        and after the step, as outputs are reset to unperturbed values.
+        """
+        system = self._system()
+        outputs = system._outputs
+        idxs = self._convrg_local_idxs if self._convrg_vars else slice(None)
+
+        krylov_maxiter = min(
+            self.options["newton_krylov_maxiter"],
+            self.options["maxiter"] - self._iter_count - 1,
+        )
+        if krylov_maxiter < 1:
+            return super(RecklessNonlinearBlockGS, self)._single_iteration()
+
+        x = self._newton_x
+        base = outputs.asarray(copy=True)
+        g = base[idxs]
+        step = self.options["newton_fd_step"] * max(1.0, np.linalg.norm(x))
+
+        def jac_product(v):
+            h = step / np.linalg.norm(v)
+            outputs.set_val(base)
+            outputs.set_val(x + h * v, idxs)
+            # perturbed sweeps neither skip subsystems nor leave snapshots behind
+            self._skip_snapshots.clear()
+            self._sweep()
+            self._iter_count += 1
+            return (outputs.asarray()[idxs] - g) / h - v
+
+        dx = _gmres(
+            jac_product,
+            x - g,
+            self.options["newton_krylov_rtol"],
+            krylov_maxiter,
+        )
+        outputs.set_val(base)
+        outputs.set_val(x + dx, idxs)
+        self._skip_snapshots.clear()
+        self._newton_x = x + dx
+        self.newton_steps += 1
+        super(RecklessNonlinearBlockGS, self)._single_iteration()
+
+    def _sweep(self):
+        """Perform a sweep as a subsolver call"""
+        self._solver_info.append_subsolver()
+        self._gs_iter()
+        self._solver_info.pop()
 
     def _is_rtol_converged(self, ratio):
         """
         Check convergence regarding relative error tolerance.
 
+        When convergence variables are set, each of them has to meet either
+        its absolute or its relative tolerance.
+
         Parameters
         ----------
-        norm : float
-            error (residuals norm)
-        norm0 : float
-            initial error
+        ratio : float
+            relative error
 
         Returns
         -------
         bool
             whether convergence is reached regarding relative error tolerance
         """
-        system = self._system()
         if self._convrg_vars:
-            nbvars = len(self._convrg_vars)
-            rerrs = np.ones(nbvars)
-            outputs = np.ones(nbvars)
-            for i, name in enumerate(self._convrg_vars):
-                outputs = self._get_views_array(system._outputs._views[name])
-                residual = self._get_views_array(system._residuals._views[name])
-                rerrs[i] = np.linalg.norm(residual) / np.linalg.norm(outputs)
-            is_rtol_converged = (rerrs < self._convrg_rtols).all()
-            is_rtol_converged = ratio < self.options["rtol"]
+            return np.all(
+                (self._aerrs <= self._convrg_atols)
+                | (self._rerrs <= self._convrg_rtols)
+            )
         else:
-            is_rtol_converged = ratio < self.options["rtol"]
-        return is_rtol_converged
+            return ratio < self._rtol
 
     def _iter_get_norm(self):
         """
         Return the norm of the residual regarding convergence variable settings.
 
+        When convergence variables are set, absolute and relative errors of each of them
+        are computed in the same pass regarding their norms.
+
         Returns
         -------
         float
             norm.
         """
         system = self._system()
-        if self._convrg_vars:
-            total = []
-            val_convrg_vars = np.zeros(len(self._convrg_vars))
-            for i, name in enumerate(self._convrg_vars):
-                total.append(self._get_views_array(system._residuals._views[name]))
-                val_convrg_vars[i] = np.linalg.norm(
-                    self._get_views_array(system._outputs._views[name])
+        # with apply_nonlinear, the initial residual is computed before any sweep
+        if self._subsys_times is not None and self._iter_count > 0:
+            residuals = system._residuals.asarray()
+            self._subsys_changes.append(
+                np.sqrt(
+                    np.bincount(
+                        self._subsys_vids,
+                        weights=residuals * residuals,
+                        minlength=self._subsys_times.size,
+                    )
                 )
-            norm = np.linalg.norm(np.concatenate(total))
+            )
+        if self._convrg_vars:
+            residuals = system._residuals.asarray()[self._convrg_idxs]
+            outputs = system._outputs.asarray()[self._convrg_idxs]
+            return self._compute_convrg_errors(residuals, outputs)
         else:
-            norm = super(RecklessNonlinearBlockGS, self)._iter_get_norm()
+            return super(RecklessNonlinearBlockGS, self)._iter_get_norm()
 
-        if self._convrg_vars:
-            return norm, val_convrg_vars
+    def _compute_convrg_errors(self, residuals, outputs):
+        """
+        Compute absolute and relative errors of each convergence variable.
+
+        Per variable partial sums are packed in one buffer reduced in a single
+        collective call under MPI, a second one being needed only for max based norms.
+
+        Parameters
+        ----------
+        residuals : ndarray
+            residuals of owned convergence variables entries, concatenated.
+        outputs : ndarray
+            values of owned convergence variables entries, concatenated.
+
+        Returns
+        -------
+        float
+            l2 norm of the residuals of convergence variables over all processes.
+        """
+        comm = self._system().comm
+        vids = self._convrg_vids
+        kinds = self._convrg_kinds
+        aerrs = self._aerrs
+        rerrs = self._rerrs
+        nbvars = aerrs.size
+        parallel = MPI is not None and comm.size > 1
+
+        sums = np.empty((2, nbvars))
+        sums[0] = np.bincount(vids, weights=residuals * residuals, minlength=nbvars)
+        sums[1] = np.bincount(vids, weights=outputs * outputs, minlength=nbvars)
+        if parallel:
+            comm.Allreduce(MPI.IN_PLACE, sums, op=MPI.SUM)
+        res_l2 = np.sqrt(sums[0])
+        out_l2 = np.sqrt(sums[1])
+
+        if "linf" in kinds or "pointwise" in kinds:
+            abs_res = np.abs(residuals)
+            abs_out = np.abs(outputs)
+            maxs = np.zeros((3, nbvars))
+            np.maximum.at(maxs[0], vids, abs_res)
+            np.maximum.at(maxs[1], vids, abs_out)
+            np.maximum.at(maxs[2], vids, abs_res / _nonzero(abs_out))
+            if parallel:
+                comm.Allreduce(MPI.IN_PLACE, maxs, op=MPI.MAX)
+            res_linf, out_linf, pointwise = maxs
+
+        mask = kinds.get("l2")
+        if mask is not None:
+            aerrs[mask] = res_l2[mask]
+            rerrs[mask] = res_l2[mask] / _nonzero(out_l2[mask])
+
+        mask = kinds.get("linf")
+        if mask is not None:
+            aerrs[mask] = res_linf[mask]
+            rerrs[mask] = res_linf[mask] / _nonzero(out_linf[mask])
+
+        mask = kinds.get("norm_change")
+        if mask is not None:
+            if self._prev_values is None:
+                aerrs[mask] = np.inf
+                rerrs[mask] = 1.0
+            else:
+                change = np.abs(out_l2[mask] - self._prev_values[mask])
+                aerrs[mask] = change
+                rerrs[mask] = change / _nonzero(self._prev_values[mask])
+            self._prev_values = out_l2
+
+        mask = kinds.get("pointwise")
+        if mask is not None:
+            aerrs[mask] = res_linf[mask]
+            rerrs[mask] = pointwise[mask]
+
+        return np.sqrt(np.sum(sums[0]))
+
+    def _run_apply(self):
+        """
+        Run the apply_nonlinear method on the system if use_apply_nonlinear is set.
+
+        Otherwise residuals are the change of outputs between sweeps and the initial
+        apply_nonlinear pass is replaced by a first sweep.
+        """
+        if self.options["use_apply_nonlinear"]:
+            super(RecklessNonlinearBlockGS, self)._run_apply()
+        elif self._iter_count < 1:
+            self._single_iteration()
+            self._iter_count += 1
+
+    def set_optim_stage(self, stage):
+        """
+        Set the stage of the outer optimization, used to schedule relative tolerances.
+
+        Parameters
+        ----------
+        stage : str or None
+            one of OPTIM_STAGES, None when not optimizing.
+        """
+        if stage is not None and stage not in OPTIM_STAGES:
+            raise ValueError(
+                "Optimization stage '{}' unknown, should be one of {}.".format(
+                    stage, OPTIM_STAGES
+                )
+            )
+        self.optim_stage = stage
+
+    def _get_rtol_factor(self):
+        """Return the factor applied to relative tolerances at the optimization stage"""
+        return self.options["rtol_schedule"].get(self.optim_stage, 1.0)
+
+    def get_history(self):
+        """
+        Get convergence history of last iterations, oldest first.
+
+        Iterations are recorded when history_size option is set, without any recorder.
+
+        Returns
+        -------
+        dict or None
+            arrays of solve index, iteration, norm, ratio, rerrs (relative error of each
+            convergence variable, one column per variable) and time (sweep wall time
+            in seconds), None if history is not enabled.
+        """
+        if self._history is None:
+            return None
+        return self._history.get()
+
+    def _gs_iter(self):
+        """
+        Perform a sweep over this Solver's subsystems regarding sweep_mode option.
+
+        In jacobi and hybrid modes, inputs of all subsystems of a stage are transferred
+        before executing them concurrently in a thread pool. Subsystems whose inputs
+        did not change since their last execution are skipped when skip_rtol is set.
+        """
+        if self._sweep_stages is None:
+            return super(RecklessNonlinearBlockGS, self)._gs_iter()
+
+        system = self._system()
+        relevant = set(system._relevance.filter(system._all_subsystem_iter()))
+        for stage in self._sweep_stages:
+            subsystems = [subsys for subsys in stage if subsys in relevant]
+            for subsys in subsystems:
+                system._transfer("nonlinear", "fwd", subsys.name)
+
+            if len(subsystems) == 1:
+                self._solve_subsystem(subsystems[0])
+            elif subsystems:
+                if self._executor is None:
+                    workers = self.options["sweep_workers"] or max(
+                        len(stage) for stage in self._sweep_stages
+                    )
+                    self._executor = ThreadPoolExecutor(max_workers=workers)
+                # consume results to propagate exceptions
+                list(self._executor.map(self._solve_subsystem, subsystems))
+
+    def _solve_subsystem(self, subsys):
+        """
+        Run the nonlinear solve of the given subsystem unless it can be skipped.
+
+        Parameters
+        ----------
+        subsys : <System>
+            subsystem to execute.
+        """
+        skip_map = self._skip_maps.get(subsys.name)
+        if skip_map is not None:
+            idxs, vids, nbvars = skip_map
+            inputs = self._system()._inputs.asarray()[idxs]
+            snapshot = self._skip_snapshots.get(subsys.name)
+            if snapshot is not None:
+                delta = inputs - snapshot
+                if np.all(
+                    np.bincount(vids, weights=delta * delta, minlength=nbvars)
+                    <= self.options["skip_rtol"] ** 2
+                    * np.bincount(vids, weights=snapshot * snapshot, minlength=nbvars)
+                ):
+                    self.skip_counts[subsys.name] += 1
+                    return
+
+        tic = time.perf_counter()
+        try:
+            subsys._solve_nonlinear()
+        except AnalysisError as err:
+            self._skip_snapshots.pop(subsys.name, None)
+            if self.options["reraise_child_analysiserror"]:
+                raise err
         else:
-            return norm
+            if skip_map is not None:
+                # taken after execution as a subgroup updates its own inputs
+                self._skip_snapshots[subsys.name] = self._system()._inputs.asarray()[
+                    idxs
+                ]
+        finally:
+            if self._subsys_times is not None:
+                # each subsystem is run by one thread at a time
+                self._subsys_times[self._subsys_index[subsys.name]] += (
+                    time.perf_counter() - tic
+                )
+
+    def cleanup(self):
+        """
+        Clean up resources prior to exit.
+        """
+        super(RecklessNonlinearBlockGS, self).cleanup()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
 
     @staticmethod
     def _get_views_array(vector_views):
         """Simple backward compatibility function as views changes in 3.38 then 3.40"""
-        if openmdao_version > "3.39.0":
+        if _VIEWS_LAYOUT == "vecdata":
             return vector_views.flat
-        elif openmdao_version > "3.37.0":
+        elif _VIEWS_LAYOUT == "tuple":
             return vector_views[0]
         else:
             return vector_views
+
+    @classmethod
+    def _get_flat_indices(cls, vector, names):
+        """Return indices of variables in the flat data array of the vector,
+        concatenated in names order, and start offset of each variable within those
+        indices"""
+        ranges = [cls._get_views_range(vector, name) for name in names]
+        sizes = np.array([stop - start for start, stop in ranges], dtype=int)
+        if ranges:
+            idxs = np.concatenate([np.arange(start, stop) for start, stop in ranges])
+        else:
+            idxs = np.zeros(0, dtype=int)
+        return idxs, np.cumsum(sizes) - sizes
+
+    @staticmethod
+    def _get_views_range(vector, name):
+        """Return (start, stop) of variable name in the flat data array of the vector"""
+        if _VIEWS_LAYOUT == "vecdata":
+            return vector._views[name].range
+        # Older layouts: locate the variable view within the vector data buffer
+        flat = np.ravel(RecklessNonlinearBlockGS._get_views_array(vector._views[name]))
+        data = vector.asarray()
+        start = (
+            flat.__array_interface__["data"][0] - data.__array_interface__["data"][0]
+        ) // data.itemsize
+        return start, start + flat.size
@@ -0,0 +1,155 @@
+"""
+Tuning of RecklessNonlinearBlockGS convergence tolerances from convergence histories
+"""
+
+import numpy as np
+
+DEFAULT_RTOL_CANDIDATES = [1e-2, 1e-3, 1e-4, 1e-5, 1e-6, 1e-7, 1e-8]
+
+
+def predict_iterations(history, rtols):
+    """
+    Replay recorded solves to predict iteration counts with given relative tolerances.
+
+    Solves are assumed to be recorded with tighter tolerances, a solve being predicted
+    to stop at its first iteration where each convergence variable meets its
+    relative tolerance (absolute tolerances being ignored).
+
+    Parameters
+    ----------
+    history : dict
+        convergence history as returned by RecklessNonlinearBlockGS.get_history().
+    rtols : array_like
+        relative tolerance of each convergence variable.
+
+    Returns
+    -------
+    ndarray
+        predicted iteration count of each recorded solve, the last recorded iteration
+        if tolerances are not met.
+    """
+    met = np.all(history["rerrs"] <= np.asarray(rtols, dtype=float), axis=1)
+    solves = history["solve"]
+    counts = []
+    for solve in np.unique(solves):
+        in_solve = solves == solve
+        iterations = history["iteration"][in_solve]
+        stops = iterations[met[in_solve]]
+        counts.append(stops[0] if stops.size else iterations[-1])
+    return np.array(counts)
+
+
+def tune_convrg_rtols(
+    prob,
+    solver,
+    points,
+    responses,
+    error_tol=1e-6,
+    candidates=None,
+    reference_rtol=1e-12,
+):
+    """
+    Propose per-variable relative tolerances of a RecklessNonlinearBlockGS solver.
+
+    A calibration batch of design points is solved with tight reference tolerances,
+    recording convergence histories and response values. Starting with the loosest
+    candidate tolerance for every convergence variable, the variable whose tightening
+    increases the iteration count predicted from histories the least is tightened until
+    responses match reference values within error_tol at every design point.
+
+    Parameters
+    ----------
+    prob : <Problem>
+        problem set up with the solver.
+    solver : RecklessNonlinearBlockGS
+        solver with convergence variables to tune.
+    points : list of dict
+        design points of the calibration batch, as dicts of variable values by name.
+    responses : list of str
+        names of quantities (objective, constraints, ...) whose error is bounded.
+    error_tol : float
+        bound of the error of responses relative to reference values (absolute
+        for reference values lower than 1).
+    candidates : list of float
+        candidate relative tolerances, DEFAULT_RTOL_CANDIDATES by default.
+    reference_rtol : float
+        relative tolerance of the reference solves.
+
+    Returns
+    -------
+    dict
+        solver options with tuned convrg_rtols, to be passed to solver.options.update().
+    dict
+        tuning report with expected iteration count per solve of reference and tuned
+        tolerances and max error of responses.
+    """
+    candidates = np.sort(np.asarray(candidates or DEFAULT_RTOL_CANDIDATES))[::-1]
+    prob.final_setup()
+    names = list(solver._convrg_vars)
+    if not names:
+        raise RuntimeError("Convergence variables have to be set to tune tolerances.")
+    nbvars = len(names)
+
+    model = prob.model
+    initial = model._outputs.asarray(copy=True)
+    saved_options = {
+        key: solver.options[key] for key in ["convrg_rtols", "history_size"]
+    }
+    # converged states of previous solves would bias iteration counts
+    saved_stores = (solver.memo, solver._warm_start)
+    solver.memo = solver._warm_start = None
+
+    def solve_batch(rtols):
+        solver.options["convrg_rtols"] = list(rtols)
+        values = []
+        for point in points:
+            model._outputs.set_val(initial)
+            for name, value in point.items():
+                prob.set_val(name, value)
+            prob.run_model()
+            values.append(
+                np.concatenate([np.ravel(prob.get_val(name)) for name in responses])
+            )
+        return np.array(values)
+
+    try:
+        solver.options["history_size"] = len(points) * (solver.options["maxiter"] + 1)
+        reference = solve_batch([reference_rtol] * nbvars)
+        history = solver.get_history()
+        solver.options["history_size"] = 0
+        scale = np.maximum(np.abs(reference), 1.0)
+
+        levels = np.zeros(nbvars, dtype=int)
+        while True:
+            rtols = candidates[levels]
+            error = np.max(np.abs(solve_batch(rtols) - reference) / scale)
+            if error <= error_tol:
+                break
+            cost = np.mean(predict_iterations(history, rtols))
+            best = None
+            for i in np.flatnonzero(levels < len(candidates) - 1):
+                tighter = levels.copy()
+                tighter[i] += 1
+                increase = np.mean(predict_iterations(history, candidates[tighter]))
+                increase -= cost
+                # tightening a variable which is not binding would not change anything
+                if increase > 0 and (best is None or increase < best[0]):
+                    best = (increase, i)
+            if best is not None:
+                levels[best[1]] += 1
+            elif np.all(levels == len(candidates) - 1):
+                break
+            else:
+                # histories do not discriminate variables, tighten all of them
+                levels[levels < len(candidates) - 1] += 1
+    finally:
+        solver.options.update(saved_options)
+        solver.memo, solver._warm_start = saved_stores
+
+    options = {"convrg_vars": names, "convrg_rtols": [float(rtol) for rtol in rtols]}
+    report = {
+        "reference_iterations": predict_iterations(history, [reference_rtol] * nbvars),
+        "iterations": predict_iterations(history, rtols),
+        "error": error,
+    }
+    return options, report
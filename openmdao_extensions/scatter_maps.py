@@ -0,0 +1,204 @@
+"""
+Flat index maps between optimizer vectors and model outputs compiled at driver setup
+"""
+
+import numpy as np
+from openmdao.utils.units import unit_conversion
+
+
+class ScatterMaps(object):
+    """
+    Vectorized transfers between optimizer vectors and the root outputs of a model.
+
+    Design points are scattered into design variable sources and responses gathered
+    from their sources with one indexed assignment each. Driver scaling and unit
+    conversions, both affine, are folded into per-entry gains and biases, so that
+    optimizer values equal model values times gain plus bias.
+
+    Attributes
+    ----------
+    n_x: int
+        Size of design points.
+    n_y: int
+        Size of response vectors.
+    """
+
+    def __init__(
+        self, model, dv_idxs, dv_gain, dv_bias, resp_idxs, resp_gain, resp_bias
+    ):
+        self._model = model
+        self._dv_idxs = dv_idxs
+        self._dv_gain = dv_gain
+        self._dv_bias = dv_bias
+        self._resp_idxs = resp_idxs
+        self._resp_gain = resp_gain
+        self._resp_bias = resp_bias
+        self.n_x = dv_idxs.size
+        self.n_y = resp_idxs.size
+
+    def set_design_point(self, point):
+        """
+        Set design variable sources from a design point.
+
+        Parameters
+        ----------
+        point : ndarray
+            design point in driver scaling and units.
+        """
+        data = self._model._outputs.asarray()
+        data[self._dv_idxs] = (point - self._dv_bias) / self._dv_gain
+
+    def get_responses(self):
+        """
+        Get response values.
+
+        Returns
+        -------
+        ndarray
+            flat response values in driver scaling and units.
+        """
+        data = self._model._outputs.asarray()
+        return data[self._resp_idxs] * self._resp_gain + self._resp_bias
+
+
+def _units_in_scaling(driver):
+    """Whether unit conversions are folded in total scalers and adders of metadata"""
+    # OpenMDAO versions with autoscalers convert units separately
+    return not hasattr(driver, "_autoscaler")
+
+
+def _get_scaling(meta):
+    """Total scaler and adder of a variable of interest, 1.0 and 0.0 when not set"""
+    scaler = 1.0 if meta["total_scaler"] is None else meta["total_scaler"]
+    adder = 0.0 if meta["total_adder"] is None else meta["total_adder"]
+    return scaler, adder
+
+
+def _compile_voi(model, meta, units_in_scaling):
+    """Root vector indices, gain and bias of a variable of interest"""
+    src_name = meta["source"]
+    start, stop = model._outputs.get_range(src_name)
+    idxs = np.arange(start, stop)
+    if meta["indices"] is not None:
+        idxs = idxs[meta["indices"].as_array()]
+    size = idxs.size
+
+    factor, offset = 1.0, 0.0
+    if meta["units"] is not None and not units_in_scaling:
+        src_units = model._var_allprocs_abs2meta["output"][src_name]["units"]
+        factor, offset = unit_conversion(src_units, meta["units"])
+    scaler, adder = _get_scaling(meta)
+
+    # scaled = ((value + offset) * factor + adder) * scaler
+    gain = np.broadcast_to(factor * scaler, size)
+    bias = np.broadcast_to((offset * factor + adder) * scaler, size)
+    return idxs, gain, bias
+
+
+def _concatenate(maps):
+    if not maps:
+        return np.zeros(0, dtype=int), np.zeros(0), np.zeros(0)
+    return tuple(np.concatenate(arrs) for arrs in zip(*maps))
+
+
+def compile_scatter_maps(driver, responses):
+    """
+    Compile scatter maps of design variables and gather maps of given responses.
+
+    Parameters
+    ----------
+    driver : <Driver>
+        driver set up with its problem.
+    responses : list of str
+        names of objectives and constraints in the order of response vectors.
+
+    Returns
+    -------
+    ScatterMaps or None
+        maps, None when some variable of interest is discrete, distributed or remote,
+        values having to be transferred variable by variable in that case.
+    """
+    model = driver._problem().model
+    if model.comm.size > 1 or driver._designvars_discrete:
+        return None
+
+    resp_meta = {**driver._objs, **driver._cons}
+    if any(resp_meta[name]["source"] in model._discrete_outputs for name in responses):
+        return None
+
+    units_in_scaling = _units_in_scaling(driver)
+    dv_idxs, dv_gain, dv_bias = _concatenate(
+        [
+            _compile_voi(model, meta, units_in_scaling)
+            for meta in driver._designvars.values()
+        ]
+    )
+    resp_idxs, resp_gain, resp_bias = _concatenate(
+        [_compile_voi(model, resp_meta[name], units_in_scaling) for name in responses]
+    )
+    return ScatterMaps(
+        model, dv_idxs, dv_gain, dv_bias, resp_idxs, resp_gain, resp_bias
+    )
+
+
+def set_design_point(driver, point, maps=None):
+    """
+    Set design variables of the driver problem from a flat design point.
+
+    Driver scaling is undone with the total scaler and adder of design variables
+    metadata, as done by compiled maps and for bounds (see get_design_var_bounds).
+
+    Parameters
+    ----------
+    driver : <Driver>
+        driver set up with its problem.
+    point : ndarray
+        design point in driver scaling and units, design variables concatenated.
+    maps : ScatterMaps or None
+        maps of the driver, design variables being set one by one when None.
+    """
+    if maps is not None:
+        maps.set_design_point(point)
+        return
+
+    i = 0
+    for name, meta in driver._designvars.items():
+        size = meta["size"]
+        value = point[i : i + size]
+        if _units_in_scaling(driver):
+            # the public method of older OpenMDAO versions unscales values itself
+            driver.set_design_var(name, value)
+        else:
+            # Unscale: x_model = x_optimizer / scaler - adder
+            scaler, adder = _get_scaling(meta)
+            driver._set_design_var(name, value / scaler - adder)
+        i += size
+
+
+def get_design_var_bounds(driver):
+    """
+    Get bounds of design variables in driver scaling and units.
+
+    Parameters
+    ----------
+    driver : <Driver>
+        driver set up with its problem.
+
+    Returns
+    -------
+    dict
+        lower and upper bounds arrays of each design variable.
+    """
+    bounds = {}
+    for name, meta in driver._designvars.items():
+        size = meta["size"]
+        lower = np.broadcast_to(np.asarray(meta["lower"], dtype=float), size)
+        upper = np.broadcast_to(np.asarray(meta["upper"], dtype=float), size)
+        if _units_in_scaling(driver):
+            # metadata bounds are scaled by OpenMDAO versions without autoscaler
+            bounds[name] = (lower.copy(), upper.copy())
+        else:
+            # metadata bounds are kept in model scaling
+            scaler, adder = _get_scaling(meta)
+            bounds[name] = ((lower + adder) * scaler, (upper + adder) * scaler)
+    return bounds
@@ -0,0 +1,352 @@
+"""
+Bounded stores of converged coupling states used by RecklessNonlinearBlockGS,
+evaluation cache and history used by optimizer drivers
+"""
+
+import os
+from collections import OrderedDict
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+class WarmStartCache(object):
+    """
+    Bounded store of converged coupling states keyed by design point.
+
+    Keys and states are kept in preallocated arrays, least recently used entries
+    being evicted first when the store is full. The nearest stored neighbour of
+    a design point is found using a KD-tree rebuilt lazily after insertions.
+
+    Attributes
+    ----------
+    size: int
+        Maximum number of stored states.
+    hits: int
+        Number of lookups which returned a stored state.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.hits = 0
+        self._keys = None
+        self._states = None
+        self._lru = OrderedDict()
+        self._tree = None
+
+    def __len__(self):
+        return len(self._lru)
+
+    def add(self, key, state):
+        """
+        Store a converged state, evicting the least recently used one when full.
+
+        Parameters
+        ----------
+        key : ndarray
+            design point.
+        state : ndarray
+            converged coupling state at the design point.
+        """
+        if self._keys is None:
+            self._keys = np.empty((self.size, key.size))
+            self._states = np.empty((self.size, state.size))
+        if len(self._lru) < self.size:
+            # slots are filled in order until the store is full
+            slot = len(self._lru)
+        else:
+            slot, _ = self._lru.popitem(last=False)
+        self._keys[slot] = key
+        self._states[slot] = state
+        self._lru[slot] = None
+        self._tree = None
+
+    def nearest(self, key):
+        """
+        Get the stored state whose design point is the nearest of the given one.
+
+        Parameters
+        ----------
+        key : ndarray
+            design point.
+
+        Returns
+        -------
+        ndarray or None
+            stored state, None if the store is empty.
+        """
+        if not self._lru:
+            return None
+        if self._tree is None:
+            self._tree = cKDTree(self._keys[: len(self._lru)])
+        _, slot = self._tree.query(key)
+        self._lru.move_to_end(slot)
+        self.hits += 1
+        return self._states[slot]
+
+    def clear(self):
+        """Remove every stored state."""
+        self._lru.clear()
+        self._tree = None
+
+
+class SolveMemo(object):
+    """
+    Bounded store of converged coupling states keyed by exact or quantized design point.
+
+    Design points are quantized on a grid of step tol, so that points equal within
+    the tolerance share the same key, then hashed. Least recently used entries are
+    evicted first when the store is full.
+
+    Attributes
+    ----------
+    size: int
+        Maximum number of stored states.
+    tol: float
+        Quantization step of design points, 0 meaning exact match.
+    hits: int
+        Number of lookups which returned a stored state.
+    misses: int
+        Number of lookups which did not.
+    """
+
+    def __init__(self, size, tol=0.0):
+        self.size = size
+        self.tol = tol
+        self.hits = 0
+        self.misses = 0
+        self._states = OrderedDict()
+
+    def __len__(self):
+        return len(self._states)
+
+    def _hash(self, key):
+        if self.tol > 0.0:
+            key = np.round(key / self.tol).astype(np.int64)
+        else:
+            # -0.0 and 0.0 have different representations
+            key = key + 0.0
+        return key.tobytes()
+
+    def add(self, key, state):
+        """
+        Store a copy of a converged state, evicting the least recently used one if full.
+
+        Parameters
+        ----------
+        key : ndarray
+            design point.
+        state : ndarray
+            converged coupling state at the design point.
+        """
+        h = self._hash(key)
+        self._states[h] = state.copy()
+        self._states.move_to_end(h)
+        if len(self._states) > self.size:
+            self._states.popitem(last=False)
+
+    def get(self, key):
+        """
+        Get the state stored for the given design point.
+
+        Parameters
+        ----------
+        key : ndarray
+            design point.
+
+        Returns
+        -------
+        ndarray or None
+            stored state, None if the design point is not stored.
+        """
+        h = self._hash(key)
+        state = self._states.get(h)
+        if state is None:
+            self.misses += 1
+        else:
+            self._states.move_to_end(h)
+            self.hits += 1
+        return state
+
+    def clear(self):
+        """Remove every stored state."""
+        self._states.clear()
+
+
+def _write_npz(filename, **arrays):
+    """Save arrays in a .npz file replaced atomically, keeping it if killed"""
+    tmp_filename = filename + ".tmp"
+    # written through a file object, np.savez would append .npz to the name
+    with open(tmp_filename, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_filename, filename)
+
+
+class EvaluationCache(SolveMemo):
+    """
+    Unbounded store of response rows keyed by exact (or quantized) design point.
+
+    Used by optimizer drivers to skip model evaluations of already evaluated design
+    points, which are frequent with integer design variables. The store can be saved
+    to and loaded from a NumPy .npz file to be shared between runs.
+
+    Attributes
+    ----------
+    tol: float
+        Quantization step of design points, 0 meaning exact match.
+    hits: int
+        Number of lookups which returned a stored row.
+    misses: int
+        Number of lookups which did not.
+    """
+
+    def __init__(self, tol=0.0):
+        super(EvaluationCache, self).__init__(np.inf, tol)
+        self._points = {}
+
+    def add(self, key, state):
+        """
+        Store a copy of the response row evaluated at a design point.
+
+        Parameters
+        ----------
+        key : ndarray
+            design point.
+        state : ndarray
+            response row at the design point.
+        """
+        super(EvaluationCache, self).add(key, state)
+        self._points[self._hash(key)] = np.array(key, dtype=float)
+
+    def clear(self):
+        """Remove every stored row."""
+        super(EvaluationCache, self).clear()
+        self._points.clear()
+
+    def save(self, filename):
+        """
+        Save stored design points and rows in a .npz file.
+
+        Parameters
+        ----------
+        filename : str
+            path of the file.
+        """
+        hashes = list(self._states)
+        _write_npz(
+            filename,
+            x=np.array([self._points[h] for h in hashes]),
+            y=np.array([self._states[h] for h in hashes]),
+        )
+
+    def load(self, filename):
+        """
+        Store design points and rows saved in a .npz file.
+
+        Parameters
+        ----------
+        filename : str
+            path of the file.
+        """
+        with np.load(filename) as data:
+            for key, row in zip(data["x"], data["y"]):
+                self.add(key, row)
+
+
+class EvaluationHistory(object):
+    """
+    Append-only store of evaluated design points and response rows saved on disk.
+
+    Rows of points followed by responses are written in a NumPy .npy file memory-mapped
+    with a capacity doubled when full, so that appending a batch only writes its rows.
+    The number of rows and the optimizer calls count are saved in a small .npz file
+    replaced atomically once appended rows are flushed: rows beyond that number, left
+    by a run killed while appending, are ignored.
+
+    Parameters
+    ----------
+    filename : str
+        path of the .npz file, rows being stored in the same path with a _rows.npy
+        suffix instead of its extension.
+
+    Attributes
+    ----------
+    n_calls: int
+        Optimizer calls count saved with the last appended rows.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.rows_filename = os.path.splitext(filename)[0] + "_rows.npy"
+        self.n_calls = 0
+        self._n_x = None
+        self._n_rows = 0
+        self._rows = None
+
+    def __len__(self):
+        return self._n_rows
+
+    def load(self):
+        """
+        Load saved rows, further rows being appended to them.
+
+        Returns
+        -------
+        ndarray
+            evaluated design points, one per row.
+        ndarray
+            response rows.
+        """
+        with np.load(self.filename) as data:
+            self._n_rows = int(data["n_rows"])
+            self._n_x = int(data["n_x"])
+            self.n_calls = int(data["n_calls"])
+        self._rows = np.lib.format.open_memmap(self.rows_filename, mode="r+")
+        rows = np.array(self._rows[: self._n_rows])
+        return rows[:, : self._n_x], rows[:, self._n_x :]
+
+    def append(self, x, y, n_calls):
+        """
+        Append evaluated design points and response rows.
+
+        Parameters
+        ----------
+        x : ndarray
+            design points, one per row.
+        y : ndarray
+            response rows.
+        n_calls : int
+            optimizer calls count.
+        """
+        rows = np.hstack((np.asarray(x, dtype=float), np.asarray(y, dtype=float)))
+        n_rows = self._n_rows + rows.shape[0]
+        if self._rows is None:
+            self._grow(n_rows, rows.shape[1])
+        elif n_rows > self._rows.shape[0]:
+            self._grow(max(n_rows, 2 * self._rows.shape[0]), rows.shape[1])
+        self._rows[self._n_rows : n_rows] = rows
+        self._rows.flush()
+
+        self._n_x = rows.shape[1] - np.shape(y)[1]
+        self._n_rows = n_rows
+        self.n_calls = n_calls
+        _write_npz(self.filename, n_rows=n_rows, n_x=self._n_x, n_calls=n_calls)
+
+    def _grow(self, capacity, n_cols):
+        """Copy saved rows in a new rows file of given capacity replaced atomically"""
+        tmp_filename = self.rows_filename + ".tmp"
+        rows = np.lib.format.open_memmap(
+            tmp_filename, mode="w+", dtype=float, shape=(capacity, n_cols)
+        )
+        if self._rows is not None:
+            rows[: self._n_rows] = self._rows[: self._n_rows]
+        rows.flush()
+        # mapped files cannot be replaced on Windows
+        del rows
+        self.close()
+        os.replace(tmp_filename, self.rows_filename)
+        self._rows = np.lib.format.open_memmap(self.rows_filename, mode="r+")
+
+    def close(self):
+        """Release the rows file."""
+        self._rows = None
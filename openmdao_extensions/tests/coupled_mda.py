@@ -0,0 +1,192 @@
+"""
+Scalable coupled MDA following the factory pattern of WhatsOpt generated analyses
+(see sellar_int), used as workload to measure nonlinear solvers.
+
+Discipline i computes its coupling vector from design variables x and coupling
+vectors of all other disciplines:
+
+    y_i = b_i + x + s / (n - 1) * sum_j w_ij * y_j + a * tanh(sum_j w_ij * y_j)
+
+with fixed random b_i and w_ij in [-1, 1], so that the coupling strength s drives
+the contraction factor of Gauss-Seidel iterations, a being the nonlinearity.
+"""
+
+import time
+
+import numpy as np
+import openmdao.api as om
+
+
+class CoupledDiscipline(om.ExplicitComponent):
+    """A discipline coupled with all other disciplines of the analysis"""
+
+    def initialize(self):
+        self.options.declare("index", types=int)
+        self.options.declare("n_disc", types=int)
+        self.options.declare("size", types=int, default=1)
+        self.options.declare("strength", default=0.5)
+        self.options.declare("nonlinearity", default=0.0)
+        self.options.declare("noise", types=bool, default=False)
+        self.options.declare("cost", default=0.0, desc="compute wall time in seconds")
+        self.options.declare("seed", types=int, default=0)
+
+    def setup(self):
+        index = self.options["index"]
+        n_disc = self.options["n_disc"]
+        size = self.options["size"]
+
+        rng = np.random.default_rng(self.options["seed"] + index)
+        self._offset = rng.uniform(1.0, 2.0, size)
+        weights = rng.uniform(-1.0, 1.0, (n_disc, size))
+        self._others = [j for j in range(n_disc) if j != index]
+        self._weights = weights[self._others]
+
+        self.add_input("x", val=np.ones(size), desc="")
+        for j in self._others:
+            self.add_input(f"y{j}", val=np.ones(size), desc="")
+
+        self.add_output(f"y{index}", val=np.ones(size), desc="")
+        if self.options["noise"]:
+            # highly nonlinear output not used by other disciplines
+            self.add_output(f"noisy{index}", val=np.ones(size), tags=["noisy"])
+
+    def setup_partials(self):
+        index = self.options["index"]
+        rows = np.arange(self.options["size"])
+        self.declare_partials(f"y{index}", "x", rows=rows, cols=rows, val=1.0)
+        for j in self._others:
+            self.declare_partials(f"y{index}", f"y{j}", rows=rows, cols=rows)
+            if self.options["noise"]:
+                self.declare_partials(f"noisy{index}", f"y{j}", rows=rows, cols=rows)
+
+    def _coupling(self, inputs):
+        return sum(w * inputs[f"y{j}"] for j, w in zip(self._others, self._weights))
+
+    def compute(self, inputs, outputs):
+        """Discipline computation"""
+        index = self.options["index"]
+        coupling = self._coupling(inputs)
+
+        outputs[f"y{index}"] = (
+            self._offset
+            + inputs["x"]
+            + self.options["strength"] / len(self._others) * coupling
+            + self.options["nonlinearity"] * np.tanh(coupling)
+        )
+        if self.options["noise"]:
+            outputs[f"noisy{index}"] = 10.0 * np.sin(10.0 * coupling)
+
+        if self.options["cost"] > 0.0:
+            time.sleep(self.options["cost"])
+
+    def compute_partials(self, inputs, partials):
+        index = self.options["index"]
+        coupling = self._coupling(inputs)
+        factor = self.options["strength"] / len(self._others) + self.options[
+            "nonlinearity"
+        ] * (1.0 - np.tanh(coupling) ** 2)
+        for j, w in zip(self._others, self._weights):
+            partials[f"y{index}", f"y{j}"] = factor * w
+            if self.options["noise"]:
+                partials[f"noisy{index}", f"y{j}"] = 100.0 * np.cos(10.0 * coupling) * w
+
+
+class CoupledFunctions(om.ExplicitComponent):
+    """Objective and constraint computed from all coupling vectors"""
+
+    def initialize(self):
+        self.options.declare("n_disc", types=int)
+        self.options.declare("size", types=int, default=1)
+
+    def setup(self):
+        size = self.options["size"]
+        self.add_input("x", val=np.ones(size), desc="")
+        for i in range(self.options["n_disc"]):
+            self.add_input(f"y{i}", val=np.ones(size), desc="")
+
+        self.add_output("f", val=1.0, desc="")
+        self.add_output("g", val=1.0, desc="")
+
+    def setup_partials(self):
+        self.declare_partials("f", "*")
+        self.declare_partials("g", "y0", val=-1.0 / self.options["size"])
+
+    def compute(self, inputs, outputs):
+        """Functions computation"""
+        size = self.options["size"]
+        ys = [inputs[f"y{i}"] for i in range(self.options["n_disc"])]
+        outputs["f"] = np.dot(inputs["x"], inputs["x"]) / size + sum(
+            np.sum(y) for y in ys
+        ) / (size * len(ys))
+        outputs["g"] = 1.0 - np.sum(ys[0]) / size
+
+    def compute_partials(self, inputs, partials):
+        size = self.options["size"]
+        n_disc = self.options["n_disc"]
+        partials["f", "x"] = 2.0 * inputs["x"] / size
+        for i in range(n_disc):
+            partials["f", f"y{i}"] = 1.0 / (size * n_disc)
+
+
+class CoupledMDAFactoryBase:
+    """
+    A factory for all plain disciplines of the coupled analysis.
+
+    One can override methods in a subclass to take control over disciplines creation
+    and pass that subclass to the analysis constructor as a factory argument.
+    """
+
+    def __init__(
+        self, size=1, strength=0.5, nonlinearity=0.0, noise=False, cost=0.0, seed=0
+    ):
+        self.size = size
+        self.strength = strength
+        self.nonlinearity = nonlinearity
+        self.noise = noise
+        self.cost = cost
+        self.seed = seed
+
+    def create_disc(self, index, n_disc):
+        return CoupledDiscipline(
+            index=index,
+            n_disc=n_disc,
+            size=self.size,
+            strength=self.strength,
+            nonlinearity=self.nonlinearity,
+            noise=self.noise,
+            cost=self.cost,
+            seed=self.seed,
+        )
+
+    def create_functions(self, n_disc):
+        return CoupledFunctions(n_disc=n_disc, size=self.size)
+
+
+class CoupledMDA(om.Group):
+    """An OpenMDAO Group to encapsulate a scalable coupled analysis"""
+
+    def initialize(self):
+        self.options.declare("n_disc", types=int, default=2, lower=2)
+        self.options.declare(
+            "factory", default=CoupledMDAFactoryBase(), types=object, recordable=False
+        )
+
+        self.nonlinear_solver = om.NonlinearBlockGS()
+        self.nonlinear_solver.options["atol"] = 1.0e-08
+        self.nonlinear_solver.options["rtol"] = 1.0e-08
+        self.nonlinear_solver.options["err_on_non_converge"] = False
+        self.nonlinear_solver.options["maxiter"] = 100
+        self.nonlinear_solver.options["iprint"] = 0
+
+    def setup(self):
+        n_disc = self.options["n_disc"]
+        factory = self.options["factory"]
+
+        self.set_input_defaults("x", val=np.ones(factory.size))
+        for i in range(n_disc):
+            self.add_subsystem(
+                f"disc{i}", factory.create_disc(i, n_disc), promotes=["*"]
+            )
+        self.add_subsystem(
+            "functions", factory.create_functions(n_disc), promotes=["*"]
+        )
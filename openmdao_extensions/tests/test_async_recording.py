@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import openmdao.api as om
+from openmdao.core.driver import Driver, RecordingDebugging
+
+from openmdao_extensions.async_recording import AsyncRecordingManager, async_recording
+from openmdao_extensions.scatter_maps import set_design_point
+
+
+class SweepDriver(Driver):
+    """Evaluate the model at given values of its design variable"""
+
+    def _declare_options(self):
+        self.options.declare("values", types=list, default=[])
+        self.options.declare("async_recording", types=bool, default=True)
+
+    def run(self):
+        model = self._problem().model
+        with async_recording(self, self.options["async_recording"], queue_size=2):
+            self.rec_mgr = self._rec_mgr
+            for i, value in enumerate(self.options["values"]):
+                set_design_point(self, np.full(100, value))
+                with RecordingDebugging("sweep", i, self):
+                    model.run_solve_nonlinear()
+        return False
+
+
+class TestAsyncRecording(unittest.TestCase):
+    def _run_sweep(self, values, enabled):
+        pb = om.Problem(reports=False)
+        pb.model.add_subsystem(
+            "functions",
+            om.ExecComp("f = x**2", x=np.zeros(100), f=np.zeros(100)),
+            promotes=["*"],
+        )
+        pb.model.add_design_var("x")
+        pb.model.add_objective("f", index=0)
+        pb.driver = SweepDriver(values=values, async_recording=enabled)
+        filename = os.path.join(self.tmpdir, "cases_{}.sql".format(enabled))
+        pb.driver.add_recorder(om.SqliteRecorder(filename))
+        pb.setup()
+        pb.run_driver()
+        pb.cleanup()
+        return pb, om.CaseReader(filename)
+
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.tmpdir = self._tmpdir.name
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def test_sweep(self):
+        values = [float(i) for i in range(20)]
+        pb, reader = self._run_sweep(values, True)
+        self.assertIsInstance(pb.driver.rec_mgr, AsyncRecordingManager)
+        self.assertEqual(pb.driver.rec_mgr.written, len(values))
+        # synchronous recording manager is restored
+        self.assertNotIsInstance(pb.driver._rec_mgr, AsyncRecordingManager)
+
+        _, sync_reader = self._run_sweep(values, False)
+        cases = reader.list_cases("driver", out_stream=None)
+        self.assertEqual(cases, sync_reader.list_cases("driver", out_stream=None))
+        for case_id, value in zip(cases, values):
+            # values at recording time although vectors changed since
+            np.testing.assert_array_equal(reader.get_case(case_id)["f"], value**2)
+
+
+if __name__ == "__main__":
+    unittest.main()
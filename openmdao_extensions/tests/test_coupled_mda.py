@@ -0,0 +1,55 @@
+import unittest
+
+import numpy as np
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_check_partials
+
+from openmdao_extensions.reckless_nonlinear_block_gs import RecklessNonlinearBlockGS
+from openmdao_extensions.tests.coupled_mda import CoupledMDA, CoupledMDAFactoryBase
+
+
+class TestCoupledMDA(unittest.TestCase):
+    def _create_problem(self, n_disc=4, **kwargs):
+        factory = CoupledMDAFactoryBase(**kwargs)
+        prob = om.Problem(CoupledMDA(n_disc=n_disc, factory=factory))
+        prob.model.nonlinear_solver.options["atol"] = 1e-12
+        prob.model.nonlinear_solver.options["rtol"] = 1e-12
+        return prob
+
+    def test_fixed_point(self):
+        prob = self._create_problem(size=3, strength=0.8, nonlinearity=0.3)
+        prob.setup()
+        prob.run_model()
+
+        prob.model.run_apply_nonlinear()
+        self.assertLess(np.linalg.norm(prob.model._residuals.asarray()), 1e-9)
+        self.assertEqual(prob["y3"].shape, (3,))
+
+    def test_coupling_strength(self):
+        iters = []
+        for strength in [0.2, 0.8]:
+            prob = self._create_problem(size=10, strength=strength)
+            prob.setup()
+            prob.run_model()
+            iters.append(prob.model.nonlinear_solver._iter_count)
+        self.assertLess(iters[0], iters[1])
+
+    def test_partials(self):
+        prob = self._create_problem(size=3, strength=0.8, nonlinearity=0.3, noise=True)
+        prob.setup(force_alloc_complex=True)
+        prob.run_model()
+        data = prob.check_partials(method="cs", out_stream=None)
+        assert_check_partials(data)
+
+    def test_noisy_outputs(self):
+        prob = self._create_problem(n_disc=3, noise=True)
+        prob.model.nonlinear_solver = nlbgs = RecklessNonlinearBlockGS(
+            convrg_vars="auto", iprint=0
+        )
+        prob.setup()
+        prob.run_model()
+        self.assertEqual(nlbgs._convrg_vars, ["disc1.y1", "disc2.y2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
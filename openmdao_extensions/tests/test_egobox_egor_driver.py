@@ -1,13 +1,121 @@
 import os
+import tempfile
+import threading
 import unittest
+from concurrent.futures import Future
+import numpy as np
 import openmdao.api as om
 from openmdao.test_suite.components.sellar_feature import SellarMDA
-from openmdao_extensions.egobox_egor_driver import EgoboxEgorDriver
+from openmdao_extensions.egobox_egor_driver import (
+    EgoboxEgorDriver,
+    FileQueueEvaluator,
+    serve_file_queue,
+)
 from openmdao_extensions.egobox_egor_driver import EGOBOX_NOT_INSTALLED
+from openmdao_extensions.reckless_nonlinear_block_gs import RecklessNonlinearBlockGS
+from openmdao_extensions.state_cache import (
+    EvaluationCache,
+    EvaluationHistory,
+    _write_npz,
+)
 
 from openmdao_extensions.tests.functions_test import BraninMDA, AckleyMDA
 
 
+class StageRecordingNLBGS(RecklessNonlinearBlockGS):
+    def __init__(self, **kwargs):
+        super(StageRecordingNLBGS, self).__init__(**kwargs)
+        self.stages = []
+
+    def set_optim_stage(self, stage):
+        super(StageRecordingNLBGS, self).set_optim_stage(stage)
+        self.stages.append(stage)
+
+
+class RecklessSellarMDA(SellarMDA):
+    def configure(self):
+        self.cycle.nonlinear_solver = self.nlbgs = StageRecordingNLBGS(
+            rtol_schedule={"doe": 1e4, "exploration": 1e2}
+        )
+
+
+class ConvergedSellarMDA(SellarMDA):
+    def configure(self):
+        # evaluations do not depend on previously evaluated points
+        self.cycle.nonlinear_solver.options["maxiter"] = 100
+        self.cycle.nonlinear_solver.options["atol"] = 1e-12
+        self.cycle.nonlinear_solver.options["rtol"] = 1e-12
+
+
+def create_sellar_problem():
+    pb = om.Problem(ConvergedSellarMDA(), reports=False)
+    pb.model.add_design_var("x", lower=0, upper=10)
+    pb.model.add_design_var("z", lower=0, upper=10)
+    pb.model.add_objective("obj")
+    pb.model.add_constraint("con1", upper=0)
+    pb.model.add_constraint("con2", upper=0)
+    pb.setup()
+    return pb
+
+
+def create_reckless_sellar_problem():
+    pb = om.Problem(RecklessSellarMDA(), reports=False)
+    pb.model.add_design_var("x", lower=0, upper=10)
+    pb.model.add_design_var("z", lower=0, upper=10)
+    pb.model.add_objective("obj")
+    pb.model.add_constraint("con1", upper=0)
+    pb.model.add_constraint("con2", upper=0)
+    pb.setup()
+    return pb
+
+
+class FailingFunctions(om.ExplicitComponent):
+    """Functions whose analysis fails when x < 2.5"""
+
+    def setup(self):
+        self.add_input("x", val=5.0)
+        self.add_input("y", val=0.0)
+        self.add_output("f")
+        self.add_output("g")
+
+    def compute(self, inputs, outputs):
+        if inputs["x"][0] < 2.5:
+            raise om.AnalysisError("Analysis failed")
+        outputs["f"] = (inputs["x"] - 3.3) ** 2 + inputs["y"] ** 2
+        outputs["g"] = inputs["x"] - 8.0
+
+
+def create_failing_problem():
+    pb = om.Problem(reports=False)
+    pb.model.add_subsystem("functions", FailingFunctions(), promotes=["*"])
+    pb.model.add_design_var("x", lower=0, upper=10)
+    pb.model.add_design_var("y", lower=-1, upper=1)
+    pb.model.add_objective("f")
+    pb.model.add_constraint("g", upper=0)
+    pb.setup()
+    return pb
+
+
+class FlakyEvaluator(object):
+    """Evaluator of failing problem functions whose first evaluations raise"""
+
+    def __init__(self, n_errors):
+        self.n_errors = n_errors
+
+    def submit(self, point, n_cstr, stage=None):
+        future = Future()
+        if self.n_errors > 0:
+            self.n_errors -= 1
+            future.set_exception(RuntimeError("Worker lost"))
+        else:
+            x, y = point
+            future.set_result((np.array([(x - 3.3) ** 2 + y**2, x - 8.0]), True))
+        return future
+
+    def shutdown(self):
+        pass
+
+
 class TestEgor(unittest.TestCase):
     def setUp(self):
         pass
@@ -80,6 +188,387 @@ class TestEgor(unittest.TestCase):
         case_recorder_filename = "test_egobox_driver_ackley.sqlite"
         self._check_recorder_file(pb, cstr=False, filename=case_recorder_filename)
 
+    @unittest.skipIf(EGOBOX_NOT_INSTALLED, "egobox is not installed")
+    def test_sellar_optim_stages(self):
+        self.pb = pb = om.Problem(RecklessSellarMDA())
+        pb.model.add_design_var("x", lower=0, upper=10)
+        pb.model.add_design_var("z", lower=0, upper=10)
+        pb.model.add_objective("obj")
+        pb.model.add_constraint("con1", upper=0)
+        pb.model.add_constraint("con2", upper=0)
+        pb.driver = EgoboxEgorDriver(optimizer="EGOR")
+        pb.driver.opt_settings["maxiter"] = 4
+        pb.setup()
+        pb.run_driver()
+
+        self.assertEqual(
+            pb.model.nlbgs.stages,
+            ["doe", "doe", "exploration", "exploration"]
+            + ["exploitation", "exploitation", "final", None],
+        )
+
+    @unittest.skipIf(EGOBOX_NOT_INSTALLED, "egobox is not installed")
+    def test_replica_optim_stages(self):
+        replicas = []
+
+        def factory():
+            replicas.append(create_reckless_sellar_problem())
+            return replicas[-1]
+
+        pb = create_sellar_problem()
+        pb.driver = EgoboxEgorDriver(parallel="thread", replica_factory=factory)
+        pb.driver.opt_settings["maxiter"] = 3
+        pb.driver.opt_settings["qei_config"] = {"batch": 2}
+        pb.setup()
+        pb.run_driver()
+        stages = {stage for replica in replicas for stage in replica.model.nlbgs.stages}
+        self.assertEqual(stages, {"doe", "exploration", "exploitation"})
+
+        # stages are sent with jobs of the file queue
+        del replicas[:]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            evaluator = FileQueueEvaluator(tmpdir, poll_interval=0.01)
+            worker = threading.Thread(
+                target=serve_file_queue, args=(tmpdir, factory, 0.01)
+            )
+            worker.start()
+            pb = create_sellar_problem()
+            pb.driver = EgoboxEgorDriver(ask_tell=True, evaluator=evaluator)
+            pb.driver.opt_settings["maxiter"] = 4
+            pb.driver.opt_settings["n_doe"] = 5
+            pb.setup()
+            pb.run_driver()
+            evaluator.shutdown()
+            worker.join()
+        self.assertEqual(
+            replicas[0].model.nlbgs.stages,
+            ["doe"] * 5 + ["exploration"] * 2 + ["exploitation"] * 2,
+        )
+
+    def _run_sellar_parallel(self, parallel):
+        pb = create_sellar_problem()
+        pb.driver = EgoboxEgorDriver(
+            parallel=parallel, replica_factory=create_sellar_problem, eval_cache=True
+        )
+        pb.driver.opt_settings["maxiter"] = 3
+        pb.driver.opt_settings["qei_config"] = {"batch": 2}
+        pb.driver.opt_settings["seed"] = 42
+        pb.setup()
+        pb.run_driver()
+        return pb
+
+    @unittest.skipIf(EGOBOX_NOT_INSTALLED, "egobox is not installed")
+    def test_sellar_thread_pool(self):
+        pb = self._run_sellar_parallel("thread")
+        cache = pb.driver.eval_cache
+        # initial and final runs on the driver model
+        self.assertEqual(pb.driver.iter_count, cache.misses + 2)
+
+        # responses evaluated by replicas are the ones of the driver model
+        seq = create_sellar_problem()
+        seq.final_setup()
+        for point in cache._points.values():
+            seq.set_val("x", point[0])
+            seq.set_val("z", point[1:])
+            seq.run_model()
+            np.testing.assert_allclose(
+                cache.get(point),
+                np.concatenate([seq["obj"], seq["con1"], seq["con2"]]),
+                rtol=1e-8,
+            )
+
+    @unittest.skipIf(EGOBOX_NOT_INSTALLED, "egobox is not installed")
+    def test_sellar_process_pool(self):
+        pb = self._run_sellar_parallel("process")
+        self.assertLessEqual(pb["con1"][0], 1e-3)
+        self.assertLessEqual(pb["con2"][0], 1e-3)
+
+    def test_parallel_without_factory(self):
+        pb = create_sellar_problem()
+        pb.driver = EgoboxEgorDriver(parallel="thread")
+        pb.driver.opt_settings["maxiter"] = 3
+        pb.setup()
+        with self.assertRaises(RuntimeError):
+            pb.run_driver()
+
+    def _run_int_cached(self, filename):
+        pb = om.Problem(reports=False)
+        pb.model.add_subsystem(
+            "px", om.IndepVarComp("x", 5.0, tags=["wop:int"]), promotes=["*"]
+        )
+        pb.model.add_subsystem(
+            "functions",
+            om.ExecComp(["f = (x - 3.3)**2", "g = x - 8.0"]),
+            promotes=["*"],
+        )
+        # only 11 design points
+        pb.model.add_design_var("x", lower=0, upper=10)
+        pb.model.add_objective("f")
+        pb.model.add_constraint("g", upper=0)
+        pb.driver = EgoboxEgorDriver(eval_cache=True, eval_cache_file=filename)
+        pb.driver.opt_settings["maxiter"] = 10
+        pb.driver.opt_settings["seed"] = 42
+        pb.setup()
+        pb.run_driver()
+        return pb
+
+    @unittest.skipIf(EGOBOX_NOT_INSTALLED, "egobox is not installed")
+    def test_int_eval_cache(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "cache.npz")
+            pb = self._run_int_cached(filename)
+            cache = pb.driver.eval_cache
+            self.assertGreater(cache.hits, 0)
+            self.assertLessEqual(len(cache), 11)
+            # initial and final runs plus evaluated points
+            self.assertEqual(pb.driver.iter_count, cache.misses + 2)
+
+            # points evaluated by the previous run are not evaluated again
+            pb = self._run_int_cached(filename)
+            self.assertEqual(pb.driver.eval_cache.misses, 0)
+            self.assertEqual(pb.driver.iter_count, 2)
+
+    @unittest.skipIf(EGOBOX_NOT_INSTALLED, "egobox is not installed")
+    def test_eval_cache_batch_duplicates(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            pb = self._run_int_cached(os.path.join(tmpdir, "cache.npz"))
+        driver = pb.driver
+        driver.eval_cache = cache = EvaluationCache()
+        driver.options["eval_cache_file"] = None
+        iter_count = driver.iter_count
+
+        res = driver._objfunc(np.array([[1.0], [4.0], [1.0]]))
+        # identical points of a batch are evaluated once
+        self.assertEqual(driver.iter_count, iter_count + 2)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+        np.testing.assert_array_equal(res[2], res[0])
+        np.testing.assert_allclose(res[:2], [[5.29, -7.0], [0.49, -4.0]])
+
+    def _run_checkpointed(self, filename, maxiter):
+        pb = om.Problem(reports=False)
+        pb.model.add_subsystem(
+            "functions",
+            om.ExecComp(["f = (x - 3.3)**2 + y**2", "g = x - 8.0"]),
+            promotes=["*"],
+        )
+        pb.model.add_design_var("x", lower=0, upper=10)
+        pb.model.add_design_var("y", lower=-1, upper=1)
+        pb.model.add_objective("f")
+        pb.model.add_constraint("g", upper=0)
+        pb.driver = EgoboxEgorDriver(checkpoint_file=filename)
+        pb.driver.opt_settings["maxiter"] = maxiter
+        pb.driver.opt_settings["seed"] = 42
+        pb.setup()
+        pb.run_driver()
+        return pb
+
+    @unittest.skipIf(EGOBOX_NOT_INSTALLED, "egobox is not installed")
+    def test_checkpoint_resume(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "checkpoint.npz")
+            pb = self._run_checkpointed(filename, 2)
+            history = EvaluationHistory(filename)
+            x, y = history.load()
+            n_doe = x.shape[0] - 2
+            self.assertEqual(y.shape, (n_doe + 2, 2))
+            self.assertEqual(history.n_calls, 3)
+            history.close()
+            self.assertEqual(pb.driver.iter_count, n_doe + 4)
+
+            # only remaining iterations are evaluated
+            pb = self._run_checkpointed(filename, 4)
+            self.assertEqual(pb.driver.iter_count, 2 + 2)
+            history = EvaluationHistory(filename)
+            x, y = history.load()
+            self.assertEqual(x.shape, (n_doe + 4, 2))
+            self.assertEqual(history.n_calls, 5)
+            np.testing.assert_allclose(np.min(y[:, 0]), pb["f"])
+            history.close()
+
+    @unittest.skipIf(EGOBOX_NOT_INSTALLED, "egobox is not installed")
+    def test_scaled_design_vars(self):
+        evaluated = []
+        pb = om.Problem(reports=False)
+        pb.model.add_subsystem(
+            "functions",
+            om.ExecComp(
+                ["f = (x - 0.033)**2 + y**2", "g = x - 0.08"],
+                x={"val": 0.05, "units": "m"},
+                g={"units": "m"},
+            ),
+            promotes=["*"],
+        )
+        pb.model.add_design_var("x", lower=0, upper=10, units="cm", scaler=2, adder=1)
+        pb.model.add_design_var("y", lower=-1, upper=1, ref=4.0)
+        pb.model.add_objective("f", ref=1e-4)
+        pb.model.add_constraint("g", upper=0)
+        pb.driver = EgoboxEgorDriver()
+        pb.driver.opt_settings["maxiter"] = 20
+        pb.driver.opt_settings["seed"] = 42
+        pb.setup()
+
+        evaluate_point = pb.driver._evaluate_point
+
+        def recording_evaluate_point(point, row):
+            success = evaluate_point(point, row)
+            evaluated.append(pb.get_val("x", units="cm").copy())
+            return success
+
+        pb.driver._evaluate_point = recording_evaluate_point
+        pb.run_driver()
+
+        # evaluated points are within bounds in model space
+        evaluated = np.concatenate(evaluated)
+        self.assertTrue(np.all((evaluated >= 0.0) & (evaluated <= 10.0)))
+        self.assertAlmostEqual(pb.get_val("x", units="cm")[0], 3.3, delta=0.1)
+        self.assertAlmostEqual(pb["y"][0], 0.0, delta=0.05)
+
+    @unittest.skipIf(EGOBOX_NOT_INSTALLED, "egobox is not installed")
+    def test_failed_evaluations(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "checkpoint.npz")
+            pb = create_failing_problem()
+            pb.driver = EgoboxEgorDriver(checkpoint_file=filename)
+            pb.driver.opt_settings["maxiter"] = 20
+            pb.driver.opt_settings["seed"] = 42
+            pb.setup()
+            pb.run_driver()
+
+            x, y = EvaluationHistory(filename).load()
+            failed = np.isnan(y).all(axis=1)
+            # failures are reported as NaN instead of zero responses
+            self.assertFalse(np.isnan(y[~failed]).any())
+            np.testing.assert_array_less(x[failed, 0], 2.5)
+            np.testing.assert_array_less(2.5, x[~failed, 0] + 1e-12)
+            self.assertEqual(pb.driver.n_failures, np.count_nonzero(failed))
+            # the failure region is learnt instead of being sampled again
+            self.assertGreater(pb.driver.n_failures, 0)
+            self.assertLess(pb.driver.n_failures, 10)
+        self.assertAlmostEqual(pb["x"][0], 3.3, delta=0.1)
+        self.assertAlmostEqual(pb["y"][0], 0.0, delta=0.1)
+
+    @unittest.skipIf(EGOBOX_NOT_INSTALLED, "egobox is not installed")
+    def test_failed_evaluations_ask_tell(self):
+        pb = create_failing_problem()
+        pb.driver = EgoboxEgorDriver(
+            ask_tell=True,
+            replica_factory=create_failing_problem,
+            n_workers=2,
+        )
+        pb.driver.opt_settings["maxiter"] = 10
+        pb.driver.opt_settings["n_doe"] = 6
+        pb.driver.opt_settings["seed"] = 42
+        pb.setup()
+        pb.run_driver()
+        self.assertGreater(pb.driver.n_failures, 0)
+        self.assertGreaterEqual(pb["x"][0], 2.5)
+        self.assertAlmostEqual(pb["x"][0], 3.3, delta=0.3)
+
+    @unittest.skipIf(EGOBOX_NOT_INSTALLED, "egobox is not installed")
+    def test_failed_doe_ask_tell(self):
+        pb = create_failing_problem()
+        # every DOE point fails, LHS points are evaluated until enough succeed
+        pb.driver = EgoboxEgorDriver(ask_tell=True, evaluator=FlakyEvaluator(3))
+        pb.driver.opt_settings["maxiter"] = 10
+        pb.driver.opt_settings["n_doe"] = 3
+        pb.driver.opt_settings["seed"] = 42
+        pb.setup()
+        pb.run_driver()
+        self.assertEqual(pb.driver.n_failures, 3)
+        self.assertAlmostEqual(pb["x"][0], 3.3, delta=0.5)
+
+    def test_file_queue_corrupt_result(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            evaluator = FileQueueEvaluator(tmpdir, poll_interval=0.01)
+            try:
+                future = evaluator.submit(np.zeros(2), 1)
+                (job,) = os.listdir(tmpdir)
+                with open(
+                    os.path.join(tmpdir, job.replace("job", "result")), "wb"
+                ) as f:
+                    f.write(b"PK")
+                with self.assertRaises(Exception):
+                    future.result(timeout=10)
+
+                # polling goes on
+                future = evaluator.submit(np.zeros(2), 1)
+                job = job.replace("_0.npz", "_1.npz")
+                self.assertTrue(os.path.exists(os.path.join(tmpdir, job)))
+                _write_npz(
+                    os.path.join(tmpdir, job.replace("job", "result")),
+                    y=np.zeros(2),
+                    success=True,
+                )
+                self.assertTrue(future.result(timeout=10)[1])
+            finally:
+                evaluator.shutdown()
+
+    @unittest.skipIf(EGOBOX_NOT_INSTALLED, "egobox is not installed")
+    def test_sellar_async_recording(self):
+        pb = create_sellar_problem()
+        pb.driver = EgoboxEgorDriver(async_recording=True, recording_queue_size=4)
+        pb.driver.opt_settings["maxiter"] = 5
+        pb.setup()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "test_egobox_driver_async.sqlite")
+            pb.driver.add_recorder(om.SqliteRecorder(filename))
+            pb.run_driver()
+            pb.cleanup()
+
+            reader = om.CaseReader(filename)
+            cases = reader.list_cases("driver", out_stream=None)
+            self.assertEqual(len(cases), pb.driver.iter_count)
+            # final run is the last recorded case
+            np.testing.assert_allclose(reader.get_case(cases[-1])["obj"], pb["obj"])
+
+    def _run_sellar_ask_tell(self, evaluator=None):
+        pb = create_sellar_problem()
+        pb.driver = EgoboxEgorDriver(
+            ask_tell=True,
+            evaluator=evaluator,
+            replica_factory=create_sellar_problem,
+            n_workers=2,
+            eval_cache=True,
+        )
+        pb.driver.opt_settings["maxiter"] = 4
+        pb.driver.opt_settings["n_doe"] = 5
+        pb.driver.opt_settings["seed"] = 42
+        pb.setup()
+        pb.run_driver()
+        return pb
+
+    @unittest.skipIf(EGOBOX_NOT_INSTALLED, "egobox is not installed")
+    def test_sellar_ask_tell(self):
+        pb = self._run_sellar_ask_tell()
+        # initial and final runs plus DOE and one point per iteration
+        self.assertEqual(pb.driver.iter_count, 2 + 5 + 4)
+        self.assertEqual(len(pb.driver.eval_cache), 5 + 4)
+        self.assertLessEqual(pb["con1"][0], 1e-3)
+        self.assertLessEqual(pb["con2"][0], 1e-3)
+
+    @unittest.skipIf(EGOBOX_NOT_INSTALLED, "egobox is not installed")
+    def test_sellar_ask_tell_file_queue(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            evaluator = FileQueueEvaluator(tmpdir, poll_interval=0.01)
+            # local stand-in of workers submitted to a cluster queue
+            n_jobs = []
+            workers = [
+                threading.Thread(
+                    target=lambda: n_jobs.append(
+                        serve_file_queue(tmpdir, create_sellar_problem, 0.01)
+                    )
+                )
+                for _ in range(2)
+            ]
+            for worker in workers:
+                worker.start()
+            pb = self._run_sellar_ask_tell(evaluator)
+            evaluator.shutdown()
+            for worker in workers:
+                worker.join()
+            self.assertEqual(sum(n_jobs), 5 + 4)
+            self.assertEqual(pb.driver.iter_count, 2 + 5 + 4)
+
     def _check_recorder_file(self, pb, cstr, filename):
         pb.driver = EgoboxEgorDriver()
         pb.driver.options["optimizer"] = "EGOR"
@@ -1,10 +1,23 @@
+import os
+import tempfile
 import unittest
 import numpy as np
 
-from openmdao.api import Problem, IndepVarComp
+from openmdao.api import (
+    Problem,
+    IndepVarComp,
+    ExecComp,
+    ExplicitComponent,
+    AnalysisError,
+    NonlinearBlockGS,
+    SqliteRecorder,
+)
 from openmdao.test_suite.components.sellar import SellarDis1, SellarDis2
 from openmdao.utils.assert_utils import assert_near_equal
-from openmdao_extensions.reckless_nonlinear_block_gs import RecklessNonlinearBlockGS
+from openmdao_extensions.reckless_nonlinear_block_gs import (
+    AndersonMixer,
+    RecklessNonlinearBlockGS,
+)
 
 
 class ContrivedSellarDis1(SellarDis1):
@@ -17,6 +30,28 @@ class ContrivedSellarDis1(SellarDis1):
         outputs["highly_nonlinear"] = 10 * np.sin(10 * inputs["y2"])
 
 
+class EmptyInputsComp(ExplicitComponent):
+    def setup(self):
+        self.add_input("a", shape=0)
+        self.add_input("x", 1.0)
+        self.add_input("b", shape=0)
+        self.add_output("y", 1.0)
+
+    def compute(self, inputs, outputs):
+        outputs["y"] = 2.0 * inputs["x"]
+
+
+class DiscreteFactorComp(ExplicitComponent):
+    def setup(self):
+        self.add_discrete_input("n", 1)
+        self.add_input("a", 1.0)
+        self.add_input("x", 1.0)
+        self.add_output("y", 1.0)
+
+    def compute(self, inputs, outputs, discrete_inputs, discrete_outputs):
+        outputs["y"] = discrete_inputs["n"] * inputs["a"] + 0.5 * inputs["x"]
+
+
 class TestRecklessNLBGS(unittest.TestCase):
     def setUp(self):
         self.prob = Problem()
@@ -67,6 +102,587 @@ class TestRecklessNLBGS(unittest.TestCase):
         assert_near_equal(prob["y1"], 25.58830273, 0.00001)
         assert_near_equal(prob["y2"], 12.05848819, 0.00001)
 
+    def test_convergence_variables_index_map(self):
+        self.nlbgs.options["convrg_vars"] = ["d1.y1", "d2.y2", "d1.highly_nonlinear"]
+        self.prob.setup()
+        self.prob.run_model()
+
+        system = self.prob.model
+        norm = self.nlbgs._iter_get_norm()
+        names = self.nlbgs.options["convrg_vars"]
+        expected = [
+            np.linalg.norm(system._residuals[name])
+            / np.linalg.norm(system._outputs[name])
+            for name in names
+        ]
+        assert_near_equal(self.nlbgs._rerrs, expected, 1e-12)
+        residuals = np.concatenate([system._residuals[name].ravel() for name in names])
+        assert_near_equal(norm, np.linalg.norm(residuals), 1e-12)
+
+    def test_convergence_per_variable_tolerances(self):
+        prob = self.prob
+        nlbgs = self.nlbgs
+        nlbgs.options["convrg_vars"] = ["d1.y1", "d2.y2"]
+
+        nlbgs.options["convrg_rtols"] = [1e-3, 1e-3]
+        prob.setup()
+        prob.run_model()
+        nb1 = nlbgs._iter_count
+        self.assertTrue(np.all(nlbgs._rerrs < 1e-3))
+
+        # tighter tolerance on y2 only drives more iterations
+        nlbgs.options["convrg_rtols"] = [1e-3, 1e-8]
+        prob.setup()
+        prob.run_model()
+        nb2 = nlbgs._iter_count
+        self.assertGreater(nb2, nb1)
+        self.assertLess(nlbgs._rerrs[1], 1e-8)
+
+        # loose absolute tolerances terminate first
+        nlbgs.options["convrg_rtols"] = [1e-12, 1e-12]
+        nlbgs.options["convrg_atols"] = [1e-1, 1e-1]
+        prob.setup()
+        prob.run_model()
+        self.assertLess(nlbgs._iter_count, nb1)
+        self.assertTrue(np.all(nlbgs._aerrs < 1e-1))
+
+    def test_convergence_norms(self):
+        prob = self.prob
+        nlbgs = self.nlbgs
+        nlbgs.options["convrg_vars"] = ["d1.y1", "d2.y2", "d1.highly_nonlinear"]
+        nlbgs.options["convrg_norms"] = ["linf", "pointwise", "norm_change"]
+        nlbgs.options["convrg_rtols"] = [1e-6, 1e-6, 1e2]
+
+        prob.setup()
+        prob.run_model()
+
+        assert_near_equal(prob["y1"], 25.58830273, 0.00001)
+        assert_near_equal(prob["y2"], 12.05848819, 0.00001)
+
+        nlbgs.options["convrg_norms"] = ["l2", "l1", "l2"]
+        prob.setup()
+        with self.assertRaises(RuntimeError) as context:
+            prob.run_model()
+        self.assertEqual(
+            str(context.exception),
+            "Convergence norm 'l1' unknown, should be one of "
+            "['l2', 'linf', 'norm_change', 'pointwise'].",
+        )
+
+    def test_norm_change_termination(self):
+        prob = self.prob
+        nlbgs = self.nlbgs
+        nlbgs.options["convrg_vars"] = ["d1.y1", "d2.y2"]
+        nlbgs.options["convrg_norms"] = ["norm_change", "norm_change"]
+        nlbgs.options["atol"] = 1e-12
+
+        prob.setup()
+        prob.run_model()
+
+        # the initial change is not measured twice, which would stop after one sweep
+        self.assertGreater(nlbgs._iter_count, 2)
+        assert_near_equal(prob["y1"], 25.58830273, 0.00001)
+        assert_near_equal(prob["y2"], 12.05848819, 0.00001)
+
+    def test_history(self):
+        prob = self.prob
+        nlbgs = self.nlbgs
+        nlbgs.options["convrg_vars"] = ["d1.y1", "d2.y2"]
+        nlbgs.options["history_size"] = 8
+
+        prob.setup()
+        self.assertIsNone(nlbgs.get_history())
+        prob.run_model()
+        nb = nlbgs._iter_count
+
+        history = nlbgs.get_history()
+        self.assertEqual(list(history["iteration"]), list(range(1, nb + 1)))
+        self.assertEqual(history["rerrs"].shape, (nb, 2))
+        assert_near_equal(history["rerrs"][-1], nlbgs._rerrs, 1e-12)
+        self.assertTrue(np.all(history["time"] > 0.0))
+
+        # ring buffer keeps last iterations only
+        prob["x"] = 2.0
+        prob.run_model()
+        history = nlbgs.get_history()
+        self.assertEqual(len(history["norm"]), 8)
+        self.assertEqual(history["solve"][-1], 2)
+        self.assertEqual(history["iteration"][-1], nlbgs._iter_count)
+
+    def test_no_apply_nonlinear(self):
+        self.nlbgs.options["convrg_vars"] = ["d1.y1", "d2.y2"]
+        self.prob.setup()
+        self.prob.run_model()
+
+        d1 = self.prob.model.d1
+        self.assertEqual(d1.iter_count_apply, 0)
+        self.assertEqual(d1.iter_count, self.nlbgs._iter_count)
+
+    def test_fast_path(self):
+        prob = self.prob
+        nlbgs = self.nlbgs
+        prob.setup()
+        prob.run_model()
+        # no option enabled, NonlinearBlockGS solve
+        self.assertTrue(nlbgs._fast_path)
+        nb = nlbgs._iter_count
+        y1 = prob["y1"].copy()
+
+        prob.model.nonlinear_solver = NonlinearBlockGS(
+            maxiter=20, atol=1e-6, rtol=1e-6, iprint=-1
+        )
+        prob.setup()
+        prob.run_model()
+        self.assertEqual(prob.model.nonlinear_solver._iter_count, nb)
+        assert_near_equal(prob["y1"], y1, 1e-12)
+
+        # state of solves with options enabled is not left behind
+        prob.model.nonlinear_solver = nlbgs
+        nlbgs.options["history_size"] = 8
+        prob.setup()
+        prob.run_model()
+        self.assertFalse(nlbgs._fast_path)
+        self.assertIsNotNone(nlbgs.get_history())
+        nlbgs.options["history_size"] = 0
+        prob.run_model()
+        self.assertTrue(nlbgs._fast_path)
+        self.assertIsNone(nlbgs.get_history())
+
+    def test_bad_convergence_variable(self):
+        self.nlbgs.options["convrg_vars"] = ["d1.y1", "d2.unknown"]
+
+        with self.assertRaises(RuntimeError) as context:
+            self.prob.setup()
+            self.prob.final_setup()
+        self.assertEqual(
+            str(context.exception),
+            "Convergence variable 'd2.unknown' not found in outputs of system ''.",
+        )
+
+    def test_auto_convergence_variables(self):
+        prob = self.prob
+        nlbgs = self.nlbgs
+        nlbgs.options["convrg_vars"] = "auto"
+
+        prob.setup()
+        prob.run_model()
+
+        # only y2 is lagged in a Gauss-Seidel sweep
+        self.assertEqual(nlbgs._convrg_vars, ["d2.y2"])
+        assert_near_equal(prob["y1"], 25.58830273, 0.00001)
+        assert_near_equal(prob["y2"], 12.05848819, 0.00001)
+
+        nlbgs.options["sweep_mode"] = "jacobi"
+        nlbgs.options["maxiter"] = 50
+        prob.setup()
+        prob.run_model()
+        self.assertEqual(nlbgs._convrg_vars, ["d1.y1", "d2.y2"])
+
+        nlbgs.options["convrg_patterns"] = ["d1.*"]
+        prob.setup()
+        prob.run_model()
+        self.assertEqual(nlbgs._convrg_vars, ["d1.y1"])
+
+        with self.assertRaises(ValueError):
+            nlbgs.options["convrg_vars"] = "all"
+
+    def test_auto_convergence_variables_exclude_tags(self):
+        prob = Problem()
+        model = prob.model
+        model.add_subsystem("c1", ExecComp("y = 0.5 * x + 0.1 * z + 1"))
+        model.add_subsystem("c2", ExecComp("y = 0.5 * x + 1"))
+        model.add_subsystem("c3", ExecComp("y = 0.01 * x", y={"tags": ["noisy"]}))
+        model.connect("c1.y", ["c2.x", "c3.x"])
+        model.connect("c2.y", "c1.x")
+        model.connect("c3.y", "c1.z")
+        model.nonlinear_solver = nlbgs = RecklessNonlinearBlockGS(
+            convrg_vars="auto", iprint=0
+        )
+        prob.setup()
+        prob.run_model()
+        self.assertEqual(nlbgs._convrg_vars, ["c2.y"])
+
+        nlbgs.options["convrg_exclude_tags"] = []
+        prob.setup()
+        prob.run_model()
+        self.assertEqual(nlbgs._convrg_vars, ["c2.y", "c3.y"])
+
+    def test_anderson(self):
+        prob = self.prob
+        nlbgs = self.nlbgs
+        nlbgs.options["convrg_vars"] = ["d1.y1", "d2.y2"]
+
+        prob.setup()
+        prob.run_model()
+        nb1 = nlbgs._iter_count
+
+        nlbgs.options["use_anderson"] = True
+        prob.setup()
+        prob.run_model()
+        nb2 = nlbgs._iter_count
+        self.assertLessEqual(nb2, nb1)
+
+        assert_near_equal(prob["y1"], 25.58830273, 0.00001)
+        assert_near_equal(prob["y2"], 12.05848819, 0.00001)
+
+    def test_anderson_with_aitken(self):
+        self.nlbgs.options["use_anderson"] = True
+        self.nlbgs.options["use_aitken"] = True
+
+        with self.assertRaises(RuntimeError) as context:
+            self.prob.setup()
+            self.prob.final_setup()
+        self.assertIn(
+            "Anderson and Aitken accelerations cannot be used together.",
+            str(context.exception),
+        )
+
+    def test_jacobi_sweep(self):
+        prob = self.prob
+        nlbgs = self.nlbgs
+        nlbgs.options["maxiter"] = 50
+        nlbgs.options["sweep_mode"] = "jacobi"
+
+        prob.setup()
+        prob.run_model()
+
+        self.assertEqual(len(nlbgs._sweep_stages), 1)
+        assert_near_equal(prob["y1"], 25.58830273, 0.00001)
+        assert_near_equal(prob["y2"], 12.05848819, 0.00001)
+        prob.cleanup()
+        self.assertIsNone(nlbgs._executor)
+
+    def test_hybrid_sweep(self):
+        prob = self.prob
+        nlbgs = self.nlbgs
+        nlbgs.options["sweep_mode"] = "hybrid"
+        nlbgs.options["convrg_vars"] = ["d1.y1", "d2.y2"]
+
+        prob.setup()
+        prob.run_model()
+
+        stages = [[subsys.name for subsys in stage] for stage in nlbgs._sweep_stages]
+        self.assertEqual(stages, [["px", "pz"], ["d1"], ["d2"]])
+        assert_near_equal(prob["y1"], 25.58830273, 0.00001)
+        assert_near_equal(prob["y2"], 12.05848819, 0.00001)
+
+    def test_concurrent_sweep_with_recorders(self):
+        prob = self.prob
+        nlbgs = self.nlbgs
+        nlbgs.options["sweep_mode"] = "jacobi"
+        with tempfile.TemporaryDirectory() as tmpdir:
+            prob.model.d1.add_recorder(
+                SqliteRecorder(os.path.join(tmpdir, "d1.sql"), record_viewer_data=False)
+            )
+            prob.setup()
+            with self.assertRaises(RuntimeError) as context:
+                prob.final_setup()
+            self.assertIn(
+                "Subsystems executed concurrently in jacobi sweep mode cannot have"
+                " recorders, found in ['d1'].",
+                str(context.exception),
+            )
+
+            # d1 is executed alone in hybrid sweep mode
+            nlbgs.options["sweep_mode"] = "hybrid"
+            prob.setup()
+            prob.run_model()
+            prob.cleanup()
+        assert_near_equal(prob["y1"], 25.58830273, 0.00001)
+
+    def test_skip_unchanged_subsystems(self):
+        prob = Problem()
+        model = prob.model
+        model.add_subsystem("c1", ExecComp("y = 0.5 * x + 1"))
+        model.add_subsystem("c2", ExecComp("y = 0.5 * x + 1"))
+        model.add_subsystem("c3", ExecComp("y = 2.0 * x"))
+        model.add_subsystem("c4", ExecComp("y = 0.2 * x + 1"))
+        model.connect("c1.y", "c2.x")
+        model.connect("c2.y", "c1.x")
+        model.connect("c4.y", "c3.x")
+        model.nonlinear_solver = nlbgs = RecklessNonlinearBlockGS(
+            maxiter=100, atol=1e-10, rtol=1e-10, iprint=0, skip_rtol=1e-14
+        )
+        prob.setup()
+        prob.run_model()
+
+        assert_near_equal(prob["c1.y"], 2.0, 1e-8)
+        assert_near_equal(prob["c3.y"], 2.4, 1e-8)
+        self.assertEqual(nlbgs.skip_counts["c1"], 0)
+        self.assertGreater(nlbgs.skip_counts["c3"], 0)
+        # c3 is executed once more than c4 as c4 output is updated after c3 first run
+        self.assertEqual(nlbgs.skip_counts["c3"] + 1, nlbgs.skip_counts["c4"])
+
+    def test_skip_zero_size_inputs(self):
+        prob = Problem()
+        model = prob.model
+        model.add_subsystem("c3", EmptyInputsComp())
+        model.add_subsystem("c4", ExecComp("y = 0.2 * x + 1"))
+        model.connect("c4.y", "c3.x")
+        model.nonlinear_solver = nlbgs = RecklessNonlinearBlockGS(
+            maxiter=100, atol=1e-10, rtol=1e-10, iprint=0, skip_rtol=1e-14
+        )
+        prob.setup()
+        prob.run_model()
+
+        assert_near_equal(prob["c3.y"], 2.4, 1e-8)
+        self.assertGreater(nlbgs.skip_counts["c3"], 0)
+
+    def test_warm_start(self):
+        prob = self.prob
+        nlbgs = self.nlbgs
+
+        iters = {}
+        for size in [0, 10]:
+            nlbgs.options["warm_start_size"] = size
+            prob.setup()
+            iters[size] = []
+            for x in [1.0, 8.0, 1.01, 8.01]:
+                prob["x"] = x
+                prob.run_model()
+                iters[size].append(nlbgs._iter_count)
+
+        self.assertEqual(len(nlbgs._warm_start), 4)
+        self.assertLess(sum(iters[10][2:]), sum(iters[0][2:]))
+        assert_near_equal(prob["y1"], 32.47034488, 0.00001)
+
+    def test_memoization(self):
+        prob = self.prob
+        nlbgs = self.nlbgs
+        nlbgs.options["memo_size"] = 2
+        prob.setup()
+
+        prob["x"] = 2.0
+        prob.run_model()
+        y1, y2 = prob["y1"].copy(), prob["y2"].copy()
+        prob["x"] = 3.0
+        prob.run_model()
+
+        # no subsystem is run, iteration counts being reset by run_model
+        d1 = prob.model.d1
+        prob["x"] = 2.0
+        prob.run_model()
+        self.assertEqual(d1.iter_count, 0)
+        self.assertEqual(nlbgs.memo.hits, 1)
+        self.assertEqual(nlbgs._iter_count, 0)
+        assert_near_equal(prob["y1"], y1, 1e-12)
+        assert_near_equal(prob["y2"], y2, 1e-12)
+        # inputs of subsystems are consistent with restored outputs
+        assert_near_equal(prob["d2.y1"], y1, 1e-12)
+
+        prob["x"] = 4.0
+        prob.run_model()
+        self.assertGreater(d1.iter_count, 0)
+        self.assertEqual(len(nlbgs.memo), 2)
+
+    def test_memoization_discrete_design_variable(self):
+        prob = Problem()
+        model = prob.model
+        ivc = model.add_subsystem("ivc", IndepVarComp())
+        ivc.add_discrete_output("n", 1)
+        ivc.add_output("a", 1.0)
+        model.add_subsystem("c1", DiscreteFactorComp())
+        model.add_subsystem("c2", ExecComp("y = 0.5 * x"))
+        model.connect("ivc.n", "c1.n")
+        model.connect("ivc.a", "c1.a")
+        model.connect("c1.y", "c2.x")
+        model.connect("c2.y", "c1.x")
+        model.nonlinear_solver = nlbgs = RecklessNonlinearBlockGS(
+            maxiter=100,
+            atol=1e-10,
+            rtol=1e-10,
+            iprint=0,
+            memo_size=2,
+            warm_start_size=2,
+        )
+        prob.setup()
+        prob.run_model()
+        assert_near_equal(prob["c1.y"], 4.0 / 3.0, 1e-8)
+
+        # discrete values are not part of design points, states are not cached
+        self.assertIsNone(nlbgs.memo)
+        self.assertIsNone(nlbgs._warm_start)
+        prob["ivc.n"] = 5
+        prob.run_model()
+        assert_near_equal(prob["c1.y"], 20.0 / 3.0, 1e-8)
+
+    def test_rtol_schedule(self):
+        prob = self.prob
+        nlbgs = self.nlbgs
+        nlbgs.options["rtol_schedule"] = {"doe": 1e3, "exploration": 1e2}
+
+        iters = {}
+        for stage in ["doe", "exploration", "exploitation", "final"]:
+            nlbgs.set_optim_stage(stage)
+            prob.setup()
+            prob.run_model()
+            iters[stage] = nlbgs._iter_count
+        self.assertLess(iters["doe"], iters["exploration"])
+        self.assertLess(iters["exploration"], iters["final"])
+        self.assertEqual(iters["exploitation"], iters["final"])
+        assert_near_equal(prob["y1"], 25.58830273, 0.00001)
+
+        with self.assertRaises(ValueError):
+            nlbgs.set_optim_stage("verification")
+        with self.assertRaises(ValueError):
+            nlbgs.options["rtol_schedule"] = {"final": 10.0}
+
+    def test_subsystem_stats(self):
+        prob = self.prob
+        nlbgs = self.nlbgs
+        nlbgs.options["subsys_stats"] = True
+        prob.setup()
+        self.assertIsNone(nlbgs.get_subsystem_stats())
+        prob.run_model()
+
+        stats = nlbgs.get_subsystem_stats()
+        self.assertEqual(stats["names"], ["px", "pz", "d1", "d2"])
+        self.assertTrue(np.all(stats["time"] > 0.0))
+        # one row per sweep
+        self.assertEqual(stats["change"].shape, (nlbgs._iter_count, 4))
+        # independent variables do not change, coupling outputs settle
+        self.assertTrue(np.all(stats["change"][1:, :2] == 0.0))
+        self.assertLess(stats["change"][-1, 2], stats["change"][1, 2])
+
+        # initial residuals are computed before any sweep
+        nlbgs.options["use_apply_nonlinear"] = True
+        prob.setup()
+        prob.run_model()
+        stats = nlbgs.get_subsystem_stats()
+        self.assertEqual(stats["change"].shape, (nlbgs._iter_count, 4))
+        self.assertLess(stats["change"][-1, 2], stats["change"][0, 2])
+
+    def test_adaptive_order(self):
+        iters = {}
+        for adaptive in [False, True]:
+            prob = Problem()
+            model = prob.model
+            # ring a -> b -> c -> d -> a declared in reverse order
+            model.add_subsystem("d", ExecComp("y = 0.9 * x + 1"))
+            model.add_subsystem("c", ExecComp("y = 0.8 * x"))
+            model.add_subsystem("b", ExecComp("y = 0.9 * x"))
+            model.add_subsystem("a", ExecComp("y = 0.9 * x + 1"))
+            model.connect("a.y", "b.x")
+            model.connect("b.y", "c.x")
+            model.connect("c.y", "d.x")
+            model.connect("d.y", "a.x")
+            model.nonlinear_solver = nlbgs = RecklessNonlinearBlockGS(
+                maxiter=500, atol=1e-12, rtol=1e-10, iprint=0
+            )
+            nlbgs.options["adaptive_order"] = adaptive
+            prob.setup()
+            iters[adaptive] = []
+            for _ in range(2):
+                prob.set_val("a.y", 0.0)
+                prob.run_model()
+                iters[adaptive].append(nlbgs._iter_count)
+            assert_near_equal(prob["a.y"], 4.55854127, 1e-8)
+
+        self.assertEqual(iters[False][0], iters[True][0])
+        self.assertLess(iters[True][1], iters[False][1] / 2)
+        self.assertEqual(nlbgs.get_subsystem_stats()["names"], ["b", "c", "d", "a"])
+
+    def _run_linear_loop(self, factor, **options):
+        prob = Problem()
+        model = prob.model
+        model.add_subsystem("c1", ExecComp("y = {} * x + 1".format(factor)))
+        model.add_subsystem("c2", ExecComp("y = x + 1"))
+        model.connect("c1.y", "c2.x")
+        model.connect("c2.y", "c1.x")
+        model.nonlinear_solver = nlbgs = RecklessNonlinearBlockGS(
+            maxiter=50, atol=1e-12, rtol=1e-8, iprint=0, convrg_vars=["c1.y"]
+        )
+        nlbgs.options.update(options)
+        prob.setup()
+        prob.run_model()
+        return prob, nlbgs
+
+    def test_contraction_extrapolated_termination(self):
+        _, nlbgs = self._run_linear_loop(0.2)
+        nb1 = nlbgs._iter_count
+        prob, nlbgs = self._run_linear_loop(0.2, contraction_window=2)
+        self.assertLess(nlbgs._iter_count, nb1)
+        assert_near_equal(nlbgs._contraction, 0.2, 1e-6)
+        assert_near_equal(prob["c1.y"], 1.5, 1e-8)
+
+    def test_contraction_divergence(self):
+        with self.assertRaises(AnalysisError) as context:
+            self._run_linear_loop(-2.0, contraction_window=2, err_on_non_converge=True)
+        self.assertIn(
+            "stopped after 4 iterations: diverging or stagnating",
+            str(context.exception),
+        )
+
+        # converging but too slowly to meet tolerances within maxiter
+        _, nlbgs = self._run_linear_loop(0.9, contraction_window=3)
+        self.assertEqual(nlbgs._iter_count, 5)
+
+    def test_newton_krylov_switch(self):
+        prob, nlbgs = self._run_linear_loop(0.95, convrg_vars=["c2.y"])
+        self.assertEqual(nlbgs._iter_count, 50)
+
+        prob, nlbgs = self._run_linear_loop(
+            0.95, convrg_vars="auto", contraction_window=2, newton_switch=0.5
+        )
+        self.assertEqual(nlbgs._convrg_vars, ["c2.y"])
+        self.assertEqual(nlbgs.newton_steps, 1)
+        # iterations count every sweep of Newton steps
+        self.assertEqual(nlbgs._iter_count, 7)
+        self.assertEqual(prob.model.c1.iter_count, 7)
+        assert_near_equal(prob["c2.y"], 40.0, 1e-6)
+
+        # perturbed sweeps do not skip subsystems
+        prob, nlbgs = self._run_linear_loop(
+            0.95,
+            convrg_vars="auto",
+            contraction_window=2,
+            newton_switch=0.5,
+            skip_rtol=1e-14,
+        )
+        self.assertEqual(nlbgs.skip_counts, {"c1": 0, "c2": 0})
+        self.assertEqual(prob.model.c1.iter_count, nlbgs._iter_count)
+        assert_near_equal(prob["c2.y"], 40.0, 1e-6)
+
+        with self.assertRaises(RuntimeError) as context:
+            self._run_linear_loop(0.95, newton_switch=0.5)
+        self.assertIn(
+            "Newton-Krylov switching requires contraction_window to be set.",
+            str(context.exception),
+        )
+
+    def test_newton_krylov_maxiter_sweeps(self):
+        for maxiter in [50, 8]:
+            prob = Problem()
+            model = prob.model
+            model.add_subsystem(
+                "c1",
+                ExecComp(
+                    "y = f * x + 1",
+                    f=np.array([0.95, 0.9, 0.8]),
+                    x=np.ones(3),
+                    y=np.ones(3),
+                ),
+            )
+            model.add_subsystem("c2", ExecComp("y = x + 1", x=np.ones(3), y=np.ones(3)))
+            model.connect("c1.y", "c2.x")
+            model.connect("c2.y", "c1.x")
+            model.nonlinear_solver = nlbgs = RecklessNonlinearBlockGS(
+                maxiter=maxiter,
+                atol=1e-12,
+                rtol=1e-8,
+                iprint=0,
+                convrg_vars="auto",
+                contraction_window=2,
+                newton_switch=0.5,
+            )
+            prob.setup()
+            prob.run_model()
+            self.assertEqual(nlbgs.newton_steps, 1)
+            self.assertEqual(prob.model.c1.iter_count, nlbgs._iter_count)
+            self.assertLessEqual(nlbgs._iter_count, maxiter)
+        # Krylov iterations are truncated to the sweeps left
+        self.assertEqual(nlbgs._iter_count, 8)
+
     def test_bad_size(self):
         self.nlbgs.options["convrg_vars"] = ["d1.y1", "d2.y2"]
         self.nlbgs.options["convrg_rtols"] = [1e-3]
@@ -79,5 +695,31 @@ class TestRecklessNLBGS(unittest.TestCase):
         )
 
 
+class TestAndersonMixer(unittest.TestCase):
+    def _solve(self, mixer, maxiter=200):
+        rng = np.random.default_rng(0)
+        q, _ = np.linalg.qr(rng.normal(size=(10, 10)))
+        A = q.dot(np.diag(np.linspace(0.5, 0.95, 10))).dot(q.T)
+        b = rng.normal(size=10)
+        x = np.zeros(10)
+        for i in range(maxiter):
+            g = A.dot(x) + b
+            if np.linalg.norm(g - x) < 1e-10:
+                break
+            x = mixer.update(x, g) if mixer else g
+        return i, x, np.linalg.solve(np.eye(10) - A, b)
+
+    def test_linear_fixed_point(self):
+        nb1, _, _ = self._solve(None)
+        nb2, x, expected = self._solve(AndersonMixer(depth=5))
+        self.assertLess(nb2, nb1 / 2)
+        assert_near_equal(x, expected, 1e-8)
+
+    def test_restart(self):
+        mixer = AndersonMixer(depth=3, restart_ratio=0.0)
+        self._solve(mixer, maxiter=10)
+        self.assertGreater(mixer.restarts, 0)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+
+import numpy as np
+from openmdao.api import ExecComp, IndepVarComp, Problem
+from openmdao.test_suite.components.sellar import SellarDis1, SellarDis2
+
+from openmdao_extensions.reckless_nonlinear_block_gs import RecklessNonlinearBlockGS
+from openmdao_extensions.rtol_tuning import predict_iterations, tune_convrg_rtols
+
+
+class TestRtolTuning(unittest.TestCase):
+    def test_predict_iterations(self):
+        history = {
+            "solve": np.array([1, 1, 1, 2, 2]),
+            "iteration": np.array([1, 2, 3, 1, 2]),
+            "rerrs": np.array(
+                [[1e-1, 1e-1], [1e-3, 1e-2], [1e-5, 1e-4], [1e-2, 1e-3], [1e-4, 1e-5]]
+            ),
+        }
+        self.assertEqual(list(predict_iterations(history, [1e-2, 1e-2])), [2, 1])
+        self.assertEqual(list(predict_iterations(history, [1e-4, 1e-2])), [3, 2])
+        # tolerances not met: last recorded iteration
+        self.assertEqual(list(predict_iterations(history, [1e-8, 1e-8])), [3, 2])
+
+    def test_tune_sellar(self):
+        prob = Problem()
+        model = prob.model
+        model.add_subsystem("px", IndepVarComp("x", 1.0), promotes=["x"])
+        model.add_subsystem(
+            "pz", IndepVarComp("z", np.array([5.0, 2.0])), promotes=["z"]
+        )
+        model.add_subsystem("d1", SellarDis1(), promotes=["x", "z", "y1", "y2"])
+        model.add_subsystem("d2", SellarDis2(), promotes=["z", "y1", "y2"])
+        model.add_subsystem(
+            "obj_cmp",
+            ExecComp("obj = x**2 + z[1] + y1 + exp(-y2)", z=np.array([0.0, 0.0])),
+            promotes=["*"],
+        )
+        model.nonlinear_solver = nlbgs = RecklessNonlinearBlockGS(
+            maxiter=100, atol=1e-14, rtol=1e-12, iprint=-1
+        )
+        nlbgs.options["convrg_vars"] = ["d1.y1", "d2.y2"]
+        prob.setup()
+
+        points = [{"x": x} for x in [1.0, 3.0, 7.0]]
+        options, report = tune_convrg_rtols(prob, nlbgs, points, ["obj"], 1e-6)
+
+        self.assertEqual(options["convrg_vars"], ["d1.y1", "d2.y2"])
+        self.assertLessEqual(report["error"], 1e-6)
+        self.assertTrue(np.all(np.array(options["convrg_rtols"]) > 1e-12))
+        self.assertLess(sum(report["iterations"]), sum(report["reference_iterations"]))
+        # solver options are left unchanged
+        self.assertEqual(nlbgs.options["convrg_rtols"], [])
+        self.assertEqual(nlbgs.options["history_size"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+
+import numpy as np
+import openmdao.api as om
+
+from openmdao_extensions.scatter_maps import (
+    compile_scatter_maps,
+    get_design_var_bounds,
+    set_design_point,
+)
+
+
+class TestScatterMaps(unittest.TestCase):
+    def setUp(self):
+        self.pb = pb = om.Problem(reports=False)
+        pb.model.add_subsystem(
+            "functions",
+            om.ExecComp(
+                ["f = sum(x**2) + y", "g = 2.0 * x", "h = y - 1.0"],
+                x={"val": np.ones(3), "units": "m"},
+                g={"val": np.ones(3), "units": "m"},
+            ),
+            promotes=["*"],
+        )
+        pb.model.add_design_var("x", lower=-10, upper=10, ref=2.0, units="cm")
+        pb.model.add_design_var("y", lower=-10, upper=10, ref0=-1.0, ref=3.0)
+        pb.model.add_objective("f", scaler=0.5)
+        pb.model.add_constraint("g", upper=0.0, indices=[0, 2], ref=10.0)
+        pb.model.add_constraint("h", upper=0.0, adder=1.0)
+        pb.setup()
+        pb.final_setup()
+
+    def test_design_point(self):
+        driver = self.pb.driver
+        maps = compile_scatter_maps(driver, ["f", "g", "h"])
+        self.assertEqual((maps.n_x, maps.n_y), (4, 4))
+
+        point = np.array([10.0, 20.0, 30.0, 0.5])
+        maps.set_design_point(point)
+        values = driver.get_design_var_values()
+        np.testing.assert_allclose(np.concatenate([values["x"], values["y"]]), point)
+        np.testing.assert_allclose(self.pb.get_val("x", units="cm"), [20.0, 40.0, 60.0])
+
+    def test_design_point_without_maps(self):
+        point = np.array([10.0, 20.0, 30.0, 0.5])
+        set_design_point(self.pb.driver, point)
+        values = self.pb.driver.get_design_var_values()
+        np.testing.assert_allclose(np.concatenate([values["x"], values["y"]]), point)
+
+    def test_design_var_bounds(self):
+        bounds = get_design_var_bounds(self.pb.driver)
+        # x in cm with ref 2, y with ref0 -1 and ref 3
+        np.testing.assert_allclose(bounds["x"][0], [-5.0, -5.0, -5.0])
+        np.testing.assert_allclose(bounds["x"][1], [5.0, 5.0, 5.0])
+        np.testing.assert_allclose(bounds["y"][0], [-2.25])
+        np.testing.assert_allclose(bounds["y"][1], [2.75])
+
+    def test_scaler_and_ref0(self):
+        pb = om.Problem(reports=False)
+        pb.model.add_subsystem(
+            "functions",
+            om.ExecComp(
+                ["f = x + y"],
+                x={"val": 0.05, "units": "m"},
+                f={"units": "m"},
+            ),
+            promotes=["*"],
+        )
+        pb.model.add_design_var("x", lower=0, upper=10, units="cm", scaler=2, adder=1)
+        pb.model.add_design_var("y", lower=-1, upper=3, ref0=-1.0, ref=3.0)
+        pb.model.add_objective("f")
+        pb.setup()
+        pb.final_setup()
+        driver = pb.driver
+
+        # bounds, compiled maps and variable by variable setting agree
+        bounds = get_design_var_bounds(driver)
+        np.testing.assert_allclose(bounds["x"][0], [2.0])
+        np.testing.assert_allclose(bounds["x"][1], [22.0])
+        np.testing.assert_allclose(bounds["y"][0], [0.0])
+        np.testing.assert_allclose(bounds["y"][1], [1.0])
+        maps = compile_scatter_maps(driver, ["f"])
+        for upper in [False, True]:
+            point = np.concatenate([bounds["x"][upper], bounds["y"][upper]])
+            for point_maps in [maps, None]:
+                set_design_point(driver, point, point_maps)
+                np.testing.assert_allclose(
+                    pb.get_val("x", units="cm"), 10.0 if upper else 0.0, atol=1e-12
+                )
+                np.testing.assert_allclose(pb["y"], 3.0 if upper else -1.0)
+
+    def test_responses(self):
+        driver = self.pb.driver
+        maps = compile_scatter_maps(driver, ["g", "f", "h"])
+        self.pb.set_val("x", [1.0, 2.0, 3.0])
+        self.pb.set_val("y", 4.0)
+        self.pb.run_model()
+
+        values = driver.get_objective_values()
+        values.update(driver.get_constraint_values())
+        expected = np.concatenate([values["g"], values["f"], values["h"]])
+        np.testing.assert_allclose(maps.get_responses(), expected)
+
+    def test_discrete(self):
+        pb = om.Problem(reports=False)
+        ivc = pb.model.add_subsystem("ivc", om.IndepVarComp(), promotes=["*"])
+        ivc.add_discrete_output("n", 1)
+        pb.model.add_subsystem("f", om.ExecComp("f = 2.0"), promotes=["*"])
+        pb.model.add_design_var("n", lower=0, upper=3)
+        pb.model.add_objective("f")
+        pb.setup()
+        pb.final_setup()
+        self.assertIsNone(compile_scatter_maps(pb.driver, ["f"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
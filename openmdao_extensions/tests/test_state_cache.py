@@ -0,0 +1,148 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from openmdao_extensions.state_cache import (
+    EvaluationCache,
+    EvaluationHistory,
+    SolveMemo,
+    WarmStartCache,
+)
+
+
+class TestWarmStartCache(unittest.TestCase):
+    def test_nearest(self):
+        cache = WarmStartCache(3)
+        self.assertIsNone(cache.nearest(np.zeros(2)))
+
+        cache.add(np.array([0.0, 0.0]), np.array([1.0]))
+        cache.add(np.array([1.0, 1.0]), np.array([2.0]))
+        cache.add(np.array([5.0, 5.0]), np.array([3.0]))
+
+        self.assertEqual(cache.nearest(np.array([0.9, 1.2]))[0], 2.0)
+        self.assertEqual(cache.nearest(np.array([4.0, 6.0]))[0], 3.0)
+        self.assertEqual(cache.hits, 2)
+
+    def test_lru_eviction(self):
+        cache = WarmStartCache(2)
+        cache.add(np.array([0.0]), np.array([1.0]))
+        cache.add(np.array([1.0]), np.array([2.0]))
+        # [0.] becomes the most recently used entry, [1.] is evicted
+        cache.nearest(np.array([0.0]))
+        cache.add(np.array([2.0]), np.array([3.0]))
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.nearest(np.array([0.9]))[0], 1.0)
+        self.assertEqual(cache.nearest(np.array([1.6]))[0], 3.0)
+
+
+class TestSolveMemo(unittest.TestCase):
+    def test_exact_match(self):
+        memo = SolveMemo(2)
+        memo.add(np.array([0.0, 1.0]), np.array([1.0]))
+        self.assertEqual(memo.get(np.array([-0.0, 1.0]))[0], 1.0)
+        self.assertIsNone(memo.get(np.array([0.0, 1.0 + 1e-15])))
+        self.assertEqual((memo.hits, memo.misses), (1, 1))
+
+    def test_tolerance_and_eviction(self):
+        memo = SolveMemo(2, tol=1e-6)
+        memo.add(np.array([1.0]), np.array([1.0]))
+        memo.add(np.array([2.0]), np.array([2.0]))
+        self.assertEqual(memo.get(np.array([1.0 + 1e-8]))[0], 1.0)
+        # [2.] is the least recently used entry
+        memo.add(np.array([3.0]), np.array([3.0]))
+        self.assertEqual(len(memo), 2)
+        self.assertIsNone(memo.get(np.array([2.0])))
+        self.assertEqual(memo.get(np.array([1.0]))[0], 1.0)
+
+
+class TestEvaluationCache(unittest.TestCase):
+    def test_save_load(self):
+        cache = EvaluationCache(tol=1e-6)
+        cache.add(np.array([1.0, 2.0]), np.array([3.0, -1.0]))
+        cache.add(np.array([2.0, 2.0]), np.array([4.0, -2.0]))
+        self.assertEqual(cache.get(np.array([1.0 + 1e-8, 2.0]))[1], -1.0)
+        self.assertIsNone(cache.get(np.array([1.0, 3.0])))
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "cache.npz")
+            cache.save(filename)
+            loaded = EvaluationCache(tol=1e-6)
+            loaded.load(filename)
+        self.assertEqual(len(loaded), 2)
+        np.testing.assert_array_equal(loaded.get(np.array([2.0, 2.0])), [4.0, -2.0])
+
+    def test_save_interrupted(self):
+        cache = EvaluationCache()
+        cache.add(np.array([1.0, 2.0]), np.array([3.0, -1.0]))
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "cache.npz")
+            cache.save(filename)
+
+            def killed_savez(f, **arrays):
+                f.write(b"PK")
+                raise KeyboardInterrupt()
+
+            cache.add(np.array([2.0, 2.0]), np.array([4.0, -2.0]))
+            with mock.patch("numpy.savez", killed_savez):
+                with self.assertRaises(KeyboardInterrupt):
+                    cache.save(filename)
+            # previously saved file is kept
+            loaded = EvaluationCache()
+            loaded.load(filename)
+        self.assertEqual(len(loaded), 1)
+
+
+class TestEvaluationHistory(unittest.TestCase):
+    def test_append_load(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "checkpoint.npz")
+            history = EvaluationHistory(filename)
+            for k in range(5):
+                history.append(np.full((k + 1, 2), k), np.full((k + 1, 1), -k), k)
+            # capacity is doubled when full
+            self.assertEqual(len(history), 15)
+            self.assertEqual(history._rows.shape, (24, 3))
+            history.close()
+
+            loaded = EvaluationHistory(filename)
+            x, y = loaded.load()
+            self.assertEqual(loaded.n_calls, 4)
+            np.testing.assert_array_equal(x[-5:], np.full((5, 2), 4))
+            np.testing.assert_array_equal(y[:3, 0], [0, -1, -1])
+
+            # rows appended after a resume follow loaded ones
+            loaded.append(np.ones((1, 2)), np.ones((1, 1)), 5)
+            loaded.close()
+            x, y = EvaluationHistory(filename).load()
+        self.assertEqual(x.shape, (16, 2))
+        np.testing.assert_array_equal(y[-1], [1.0])
+
+    def test_append_interrupted(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "checkpoint.npz")
+            history = EvaluationHistory(filename)
+            history.append(np.zeros((4, 2)), np.zeros((4, 1)), 1)
+            history.append(np.ones((2, 2)), np.ones((2, 1)), 2)
+
+            def killed_savez(f, **arrays):
+                raise KeyboardInterrupt()
+
+            # rows are written but the number of rows is not
+            with mock.patch("numpy.savez", killed_savez):
+                with self.assertRaises(KeyboardInterrupt):
+                    history.append(np.full((1, 2), 2.0), np.full((1, 1), 2.0), 3)
+            history.close()
+
+            loaded = EvaluationHistory(filename)
+            x, _ = loaded.load()
+            self.assertEqual(loaded.n_calls, 2)
+            loaded.close()
+        self.assertEqual(x.shape, (6, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()